@@ -0,0 +1,73 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+
+# Benchmarks pagination of large inputs with `Pages`.
+#
+# Run from the repository root with `python -m benchmarks.bench_pages`.
+#
+# Covers a 10 MB string and a 100,000 item list, both paginated up front and
+# built up incrementally with `append`, the way `dev exec` streams output.
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+
+from neo.modules.menus.pages import Pages
+
+STRING_SIZE = 10 * 1024 * 1024
+STRING_CHUNK = 1024
+LIST_SIZE = 100_000
+
+
+@contextmanager
+def timed(label: str):
+    start = time.perf_counter()
+    yield
+    print(f"{label:<40} {(time.perf_counter() - start) * 1000:>10.2f} ms")
+
+
+def read_all(pages: Pages):
+    for index in range(len(pages)):
+        pages[index]
+
+
+def bench_string():
+    text = "x" * STRING_SIZE
+
+    with timed("str: construct"):
+        pages = Pages(text, 1500, joiner="", prefix="```\n", suffix="\n```")
+    with timed("str: len() x 10,000"):
+        for _ in range(10_000):
+            len(pages)
+    with timed(f"str: read all {len(pages):,} pages"):
+        read_all(pages)
+
+    streamed = Pages("", 1500, joiner="")
+    with timed(f"str: append {STRING_SIZE // STRING_CHUNK:,} chunks"):
+        for _ in range(STRING_SIZE // STRING_CHUNK):
+            streamed.append("x" * STRING_CHUNK)
+    with timed("str: prepend 1,500 characters"):
+        streamed.prepend("x" * 1500)
+
+
+def bench_list():
+    items = [f"Item {i}" for i in range(LIST_SIZE)]
+
+    with timed("list: construct"):
+        pages = Pages(items, 10)
+    with timed("list: len() x 10,000"):
+        for _ in range(10_000):
+            len(pages)
+    with timed(f"list: read all {len(pages):,} pages"):
+        read_all(pages)
+
+    streamed = Pages([], 10)
+    with timed(f"list: append {LIST_SIZE:,} items"):
+        for item in items:
+            streamed.append(item)
+
+
+if __name__ == "__main__":
+    bench_string()
+    bench_list()
@@ -3,11 +3,10 @@
 from __future__ import annotations
 
 import asyncio
-import inspect
 import logging
 import sys
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 import discord
 from aiohttp import ClientSession
@@ -16,18 +15,28 @@ from discord.ext import commands
 
 from .classes import (
     Embed,
+    autocomplete,
+    coherence,
     containers,
     context,
+    display_names,
+    events,
     exceptions,
     help_command,
     partials,
+    profiler,
+    shutdown,
+    snapshot,
+    watchdog,
 )
 from .modules import *  # noqa: F403
+from .modules.menus import MenuRegistry
+from .modules.metrics import MetricsRegistry, MetricsServer, instrument_pool
 from .tools import *  # noqa: F403
 from .tools import formatters, recursive_getattr
 
 if TYPE_CHECKING:
-    from collections.abc import Awaitable, Mapping
+    from collections.abc import Collection, Mapping
 
     from asyncpg import Pool
 
@@ -38,6 +47,10 @@ if TYPE_CHECKING:
 __version__ = "1.7.1"
 
 log = logging.getLogger(__name__)
+
+# Gateway events which start new work, and are dropped during shutdown
+SHUTDOWN_INTAKE_EVENTS = frozenset({"message", "message_edit"})
+
 intents = discord.Intents(
     **dict.fromkeys(
         ["messages", "guilds", "guild_reactions", "message_content"], True
@@ -45,7 +58,7 @@ intents = discord.Intents(
 )
 
 
-class Neo(commands.Bot):
+class Neo(commands.AutoShardedBot):
     db: Pool
     session: ClientSession
     cogs: Mapping[str, Addon]
@@ -53,8 +66,69 @@ class Neo(commands.Bot):
     def __init__(self, config: NeoConfig, **kwargs):
         self.cfg = config
         self.boot_time = int(time.time())
-        self.profiles: dict[int, containers.NeoUser] = {}
-        self.configs: dict[int, containers.NeoGuildConfig] = {}
+        self.profiles = containers.CountedDict[int, containers.NeoUser]()
+        self.configs = containers.CountedDict[int, containers.NeoGuildConfig]()
+        self.metrics = MetricsRegistry()
+        self.events = events.EventBus(self)
+        for event, maxsize in (
+            config.get("events", {}).get("queue_sizes", {}).items()
+        ):
+            self.events.set_queue(event, maxsize)
+        self.coherence = coherence.CacheCoherence(self)
+        self.shutdown_coordinator = shutdown.ShutdownCoordinator()
+        self.shutdown_coordinator.register_flusher(
+            "event_queues", self.events.flush
+        )
+        self.snapshot: Optional[snapshot.StateSnapshot] = None
+        if snapshot_cfg := config.get("snapshot"):
+            self.snapshot = snapshot.StateSnapshot(
+                self,
+                path=snapshot_cfg["path"],
+                interval=snapshot_cfg["interval"],
+            )
+
+        self.profiler = profiler.CommandProfiler()
+        self.autocomplete = autocomplete.AutocompleteMiddleware(self.metrics)
+        # Exported as neo_cache_requests_total, addons may add their own
+        self.cache_stats: dict[str, containers.CacheStats] = {
+            "profiles": self.profiles.stats,
+            "configs": self.configs.stats,
+            "autocomplete": self.autocomplete.stats,
+        }
+        self.display_names = display_names.DisplayNameCache(self)
+
+        menus_cfg = config.get("menus", {})
+        self.menu_registry = MenuRegistry(
+            evictions=self.metrics.counter(
+                "neo_menus_evicted_total",
+                "Idle menus closed to stay within the menu budget",
+            ),
+            **menus_cfg,
+        )
+        self.metrics.gauge(
+            "neo_menus_active", "Menus currently running"
+        ).set_function(lambda: len(self.menu_registry))
+        self.metrics.gauge(
+            "neo_menus_bytes", "Approximate bytes of page data held by menus"
+        ).set_function(lambda: self.menu_registry.total_bytes)
+        self.metrics_server: Optional[MetricsServer] = None
+        if metrics_cfg := config.get("metrics"):
+            self.metrics_server = MetricsServer(
+                self.metrics,
+                host=metrics_cfg["host"],
+                port=metrics_cfg["port"],
+            )
+        self.watchdog = watchdog.LoopWatchdog(
+            threshold=config.get("watchdog", {}).get("threshold", 0.5),
+            lag_gauge=self.metrics.gauge(
+                "neo_event_loop_lag_seconds",
+                "How late the event loop last woke a sleeping task",
+            ),
+            stall_counter=self.metrics.counter(
+                "neo_event_loop_stalls_total",
+                "Times the event loop was blocked past the stall threshold",
+            ),
+        )
 
         kwargs["command_prefix"] = self.cfg["bot"]["prefix"]
         kwargs["activity"] = discord.Activity(
@@ -68,48 +142,232 @@ class Neo(commands.Bot):
         kwargs["intents"] = intents
         kwargs["case_insensitive"] = True
 
+        # Guild-scoped state is partitioned by shard, so a process only
+        # holds state for the guilds that its own shards receive
+        sharding = config.get("sharding", {})
+        kwargs["shard_count"] = sharding.get("shard_count", 1)
+        kwargs["shard_ids"] = sharding.get("shard_ids")
+        self.user_data_owner = sharding.get("user_data_owner", True)
+
+        # Populated from the application info once the bot is ready
+        self.owner_id_set: frozenset[int] = frozenset()
+
         super().__init__(**kwargs)
 
+        self.local_shards = frozenset(
+            self.shard_ids
+            if self.shard_ids is not None
+            else range(self.shard_count or 1)
+        )
+
         self.tree.on_error = self.general_error_handler  # type: ignore
         self.tree.interaction_check = self.tree_interaction_check
 
         self.on_command_error = self.general_error_handler  # type: ignore
 
-        self.tree.add_command(help_command.AppHelpCommand(self))
+        self.app_help = help_command.AppHelpCommand(self)
+        self.tree.add_command(self.app_help)
 
         self._async_ready = asyncio.Event()
+        self._close_task: Optional[asyncio.Task[None]] = None
         asyncio.create_task(self.__ainit__())
 
     async def __ainit__(self) -> None:
+        self.watchdog.start()
         self.session = ClientSession()
 
-        pool = await create_pool(**self.cfg["database"])
+        pool = await create_pool(
+            **self.cfg["database"],
+            # Tags this process's writes, see `CacheCoherence`
+            server_settings={"application_name": self.coherence.origin},
+        )
         if not pool:
             raise RuntimeError("Failed to create database connection")
-        self.db = pool
+        self.db = instrument_pool(
+            pool,
+            self.metrics.histogram(
+                "neo_db_pool_acquire_seconds",
+                "Time spent waiting to acquire a database connection",
+            ),
+        )
+        self.register_metrics()
+
+        # Restore state from the warm-start snapshot, if there is one
+        if self.snapshot is not None:
+            await self.snapshot.load()
+            self.snapshot.register(
+                "profiles",
+                lambda: (p.to_record() for p in self.profiles.values()),
+            )
+            self.snapshot.register(
+                "guild_configs",
+                lambda: (c.to_record() for c in self.configs.values()),
+            )
 
         # Load initial profiles from database
-        for record in await self.db.fetch("SELECT * FROM profiles"):
+        for record in await self.fetch_initial_records("profiles"):
             await self.add_profile(record["user_id"], record=record)
 
+        # Todo categories are stored separately, and always read fresh.
+        # Every profile is reset, so that none keep categories which were
+        # deleted since it was loaded (e.g. from an older snapshot)
+        categories = {
+            record["user_id"]: record["todo_categories"]
+            for record in await self.db.fetch(
+                """
+                SELECT
+                    user_id,
+                    array_agg(name ORDER BY created_at) AS todo_categories
+                FROM
+                    todo_categories
+                GROUP BY
+                    user_id
+                """
+            )
+        }
+        for user_id, profile in self.profiles.items():
+            profile.apply_record(
+                {"todo_categories": categories.get(user_id, [])}
+            )
+
         # Load initial guild configurations from database
-        for record in await self.db.fetch("SELECT * FROM guild_configs"):
+        for record in await self.fetch_initial_records("guild_configs"):
             await self.add_config(record["guild_id"], record=record)
 
+        await self.coherence.start()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+
         self._async_ready.set()
+        if self.snapshot is not None:
+            self.snapshot.timer.start()
         await self.verify_configs()
 
     async def wait_until_ready(self):
         await self._async_ready.wait()
         return await super().wait_until_ready()
 
+    def shard_for(self, guild_id: int) -> int:
+        """Returns the ID of the shard that receives events for a guild"""
+        return (guild_id >> 22) % (self.shard_count or 1)
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """Whether a guild belongs to one of this process's shards"""
+        return self.shard_for(guild_id) in self.local_shards
+
+    async def fetch_guild_records(self, table: str):
+        """
+        Fetches every row of a guild-keyed table that belongs to one of
+        this process's shards
+        """
+        return await self.db.fetch(
+            f"""
+            SELECT * FROM {table}
+            WHERE
+                (guild_id >> 22) % $1 = ANY($2::BIGINT[])
+            """,  # Table names are only ever provided internally
+            self.shard_count or 1,
+            [*self.local_shards],
+        )
+
+    async def fetch_initial_records(self, table: str):
+        """
+        Fetches the rows that a table's initial in-memory state is built
+        from, restoring them from the warm-start snapshot where possible
+        """
+        if self.snapshot is not None:
+            if (records := self.snapshot.take(table)) is not None:
+                return records
+
+        if table in snapshot.GUILD_TABLES:
+            return await self.fetch_guild_records(table)
+        return await self.db.fetch(f"SELECT * FROM {table}")
+
+    def register_metrics(self):
+        """Registers the process-wide metrics that are collected on scrape"""
+        self.metrics.gauge(
+            "neo_db_pool_size", "Connections currently held by the pool"
+        ).set_function(self.db.get_size)
+        self.metrics.gauge(
+            "neo_db_pool_idle", "Idle connections in the pool"
+        ).set_function(self.db.get_idle_size)
+
+        self.metrics.gauge(
+            "neo_gateway_latency_seconds",
+            "Gateway heartbeat latency per shard",
+            ("shard",),
+        ).set_function(
+            lambda: {
+                (str(shard_id),): latency
+                for shard_id, latency in self.latencies
+            }
+        )
+        self.metrics.gauge(
+            "neo_cached_objects",
+            "Objects held in the bot's own caches",
+            ("cache",),
+        ).set_function(
+            lambda: {
+                ("profiles",): len(self.profiles),
+                ("configs",): len(self.configs),
+            }
+        )
+
+        self.metrics.counter(
+            "neo_cache_requests_total",
+            "Lookups against in-memory caches",
+            ("cache", "result"),
+        ).set_function(
+            lambda: {
+                key: value
+                for cache, stats in self.cache_stats.items()
+                for key, value in (
+                    ((cache, "hit"), stats.hits),
+                    ((cache, "miss"), stats.misses),
+                )
+            }
+        )
+
+        stats = self.events.stats
+        self.metrics.counter(
+            "neo_event_dispatches_total",
+            "Broadcast events dispatched",
+            ("event",),
+        ).set_function(
+            lambda: {(event,): s.dispatches for event, s in stats.items()}
+        )
+        self.metrics.counter(
+            "neo_event_errors_total",
+            "Errors raised by event receivers",
+            ("event",),
+        ).set_function(
+            lambda: {(event,): s.errors for event, s in stats.items()}
+        )
+        self.metrics.counter(
+            "neo_event_dropped_total",
+            "Broadcast events dropped due to full queues",
+            ("event",),
+        ).set_function(
+            lambda: {(event,): s.dropped for event, s in stats.items()}
+        )
+
+        self.metrics.counter(
+            "neo_coherence_notifications_total",
+            "Row changes received from other processes",
+        ).set_function(lambda: self.coherence.notifications)
+        self.metrics.gauge(
+            "neo_coherence_lag_seconds",
+            "Delay of the most recently received row change",
+        ).set_function(lambda: self.coherence.last_lag)
+
     async def verify_configs(self) -> None:
         """Purges configs where the bot is no longer in the corresponding guild"""
         await self.wait_until_ready()
 
-        for guild_id in self.configs.copy():
-            if not self.get_guild(guild_id):
-                await self.delete_config(guild_id)
+        stale = self.configs.keys() - {guild.id for guild in self.guilds}
+        if stale:
+            log.info(f"Purging {len(stale)} stale guild config(s)")
+            await self.delete_configs(stale)
 
     async def add_profile(self, user_id, *, record=None):
         if not record:
@@ -157,33 +415,149 @@ class Neo(commands.Bot):
         return config
 
     async def delete_config(self, guild_id: int):
-        self.configs.pop(guild_id, None)
-        await self.db.execute(
-            """
-            DELETE FROM
-                guild_configs
-            WHERE
-                guild_id=$1
-            """,
-            guild_id,
-        )
-        self.broadcast("config_delete", guild_id)
+        await self.delete_configs((guild_id,))
+
+    async def delete_configs(
+        self, guild_ids: Collection[int], *, chunk_size: int = 1000
+    ):
+        """
+        Deletes many configs at once, broadcasting a single `config_delete`
+        event with the set of deleted guild IDs
+        """
+        deleted = frozenset(guild_ids)
+        for guild_id in deleted:
+            self.configs.pop(guild_id, None)
+
+        ordered = [*deleted]
+        for index in range(0, len(ordered), chunk_size):
+            await self.db.execute(
+                """
+                DELETE FROM
+                    guild_configs
+                WHERE
+                    guild_id = ANY($1::BIGINT[])
+                """,
+                ordered[index : index + chunk_size],
+            )
+        self.broadcast("config_delete", deleted)
+
+    async def add_cog(self, cog, /, **kwargs):
+        await super().add_cog(cog, **kwargs)
+        self.events.rebuild()
+        self.app_help.invalidate()
+
+    async def remove_cog(self, name, /, **kwargs):
+        cog = await super().remove_cog(name, **kwargs)
+        self.events.rebuild()
+        self.app_help.invalidate()
+        return cog
+
+    def apply_remote_change(self, change: coherence.RowChange):
+        """Applies a row change made by another process to cached containers"""
+        match change.table:
+            case "profiles":
+                user_id = change.row["user_id"]
+                if change.operation == "DELETE":
+                    if self.profiles.pop(user_id, None) is not None:
+                        self.broadcast("profile_delete", user_id)
+                else:
+                    if user_id in self.profiles:
+                        self.profiles[user_id].apply_record(change.row)
+                    else:
+                        self.profiles[user_id] = containers.NeoUser(
+                            pool=self.db, **change.row
+                        )
+                    self.broadcast(
+                        "user_settings_update",
+                        self.get_user(user_id, as_partial=True),
+                        self.profiles[user_id],
+                    )
+
+            case "todo_categories":
+                if not (profile := self.profiles.get(change.row["user_id"])):
+                    return
+
+                old_name, name = change.old_key["name"], change.row["name"]
+                categories = [*profile.todo_categories]
+                match change.operation:
+                    case "INSERT" if name not in categories:
+                        categories.append(name)
+                    case "UPDATE" if old_name in categories:
+                        # Renamed in place, so the category keeps its position
+                        categories[categories.index(old_name)] = name
+                    case "UPDATE" if name not in categories:
+                        categories.append(name)
+                    case "DELETE" if name in categories:
+                        categories.remove(name)
+                profile.apply_record({"todo_categories": categories})
+
+            case "guild_configs":
+                guild_id = change.row["guild_id"]
+                if not self.owns_guild(guild_id):
+                    return
+
+                if change.operation == "DELETE":
+                    if self.configs.pop(guild_id, None) is not None:
+                        self.broadcast("config_delete", frozenset({guild_id}))
+                elif guild_id in self.configs:
+                    self.configs[guild_id].apply_record(change.row)
+                else:
+                    self.configs[guild_id] = containers.NeoGuildConfig(
+                        pool=self.db, **change.row
+                    )
 
     async def start(self):
         for addon in self.cfg["addons"]:
             await self.load_extension(addon)
+        # Built up front so the first /help doesn't pay for it
+        self.app_help.build_index()
 
         async with self:
             await super().start(self.cfg["bot"]["token"])
 
     async def close(self):
+        # Closing twice waits for the first close to finish
+        if self._close_task is None:
+            self._close_task = asyncio.create_task(self._close())
+        await asyncio.shield(self._close_task)
+
+    async def _close(self):
+        # Finish in-flight work while everything it depends on is still open
+        await self.shutdown_coordinator.drain()
+
+        if self.snapshot is not None:
+            self.snapshot.timer.cancel()
+            try:
+                await self.snapshot.write()
+            except Exception as e:
+                log.error(formatters.format_exception(e))
+
+        self.watchdog.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+
+        await self.coherence.close()
         await self.session.close()
-        await asyncio.wait_for(self.db.close(), 5)
+        try:
+            await asyncio.wait_for(self.db.close(), 5)
+        except asyncio.TimeoutError:
+            log.warning("Timed out closing the pool, terminating it")
+            self.db.terminate()
 
         await super().close()
 
     async def on_ready(self):
-        log.info(f"{self.user} has received ready event")
+        # `is_owner` fetches the application's owners if they aren't known
+        await self.is_owner(self.user)  # type: ignore
+        owners = {*(self.owner_ids or ())}
+        if self.owner_id:
+            owners.add(self.owner_id)
+        self.owner_id_set = frozenset(owners)
+
+        log.info(
+            f"{self.user} has received ready event "
+            f"[shards {sorted(self.local_shards)} of {self.shard_count}]"
+        )
         if self.cfg["bot"]["sync_app_commands"]:
             await self.tree.sync()
             log.info("Synchronized command tree")
@@ -256,19 +630,35 @@ class Neo(commands.Bot):
         return user
 
     async def on_guild_remove(self, guild: discord.Guild):
+        self.display_names.invalidate(guild.id)
         await self.delete_config(guild.id)
 
+    async def on_guild_update(self, before: discord.Guild, _):
+        self.display_names.invalidate(before.id)
+
+    async def on_guild_channel_update(
+        self, before: discord.abc.GuildChannel, _
+    ):
+        self.display_names.invalidate(before.id)
+
+    async def on_guild_channel_delete(
+        self, channel: discord.abc.GuildChannel
+    ):
+        self.display_names.invalidate(channel.id)
+
+    async def on_user_update(self, before: discord.User, _):
+        self.display_names.invalidate(before.id)
+
     async def tree_interaction_check(self, interaction: discord.Interaction):
         # Intercept app commands
         if (
             interaction.type == discord.InteractionType.application_command
             and interaction.command
         ):
-            # Verify the interaction against the checks
-            # Hierarchy prioritizes channel check first since it will overrule anyways
             try:
-                await self.channel_check(interaction)
-                await self.guild_disabled_check(interaction)
+                if self.shutdown_coordinator.closing:
+                    raise exceptions.ShuttingDown()
+                self.gate_check(interaction)
             except Exception as e:
                 # If it fails, then re-raise it wrapped in an invoke error
                 raise discord.app_commands.CommandInvokeError(
@@ -278,73 +668,52 @@ class Neo(commands.Bot):
         return True
 
     # TODO: Remove this in favor of Discord's built-in permissions system?
-    async def channel_check(self, interaction: discord.Interaction):
+    def gate_check(self, interaction: discord.Interaction):
+        """
+        Checks an interaction against its guild's disabled channels and
+        commands, using the guild's precomputed gate
+        """
         # Only relevant in guilds
         if not interaction.guild or not isinstance(
             interaction.user, discord.Member
         ):
-            return True
-
-        predicates = [
-            # If the guild ID has no associated config, this check is irrelevant
-            interaction.guild.id not in self.configs,
-            # Bypasses
-            await self.is_owner(interaction.user),
-            interaction.user.guild_permissions.administrator,
-        ]
-
-        if any(predicates):
-            return True
-
-        elif (
-            interaction.channel_id
-            in self.configs[interaction.guild.id].disabled_channels
-        ):
-            # If the channel is in the list of disabled IDs, the command
-            # can't be executed
-            raise exceptions.DisabledChannel()
+            return
 
-        return True
+        # If the guild ID has no associated config, or nothing is disabled,
+        # this check is irrelevant
+        config = self.configs.get(interaction.guild.id)
+        if config is None or not (gate := config.gate):
+            return
 
-    # TODO: Remove in favor of built-in Discord permissions as well?
-    async def guild_disabled_check(self, interaction: discord.Interaction):
+        # Bypasses
         if (
-            not interaction.guild
-            or not isinstance(interaction.user, discord.Member)
-            or not isinstance(interaction.command, discord.app_commands.Command)
+            interaction.user.id in self.owner_id_set
+            or interaction.user.guild_permissions.administrator
         ):
-            return True
+            return
 
-        predicates = [
-            interaction.guild.id not in self.configs,
-            await self.is_owner(interaction.user),
-            interaction.user.guild_permissions.administrator,
-        ]
+        # Hierarchy prioritizes channel check first since it will overrule anyways
+        if interaction.channel_id in gate.disabled_channels:
+            raise exceptions.DisabledChannel()
 
-        if any(predicates):
-            return True
+        if isinstance(
+            interaction.command, discord.app_commands.Command
+        ) and gate.is_command_disabled(interaction.command.qualified_name):
+            raise exceptions.DisabledCommand(interaction.command.qualified_name)
 
-        disabled = self.configs[interaction.guild.id].disabled_commands
+    def dispatch(self, event_name: str, /, *args, **kwargs):
+        # New text commands stop being accepted once shutdown has begun.
+        # Every other event still goes through, since in-flight work may be
+        # waiting on it. App commands are refused by the tree check instead
         if (
-            interaction.command.qualified_name in disabled
-            or getattr(interaction.command.root_parent, "name", "") in disabled
+            event_name in SHUTDOWN_INTAKE_EVENTS
+            and self.shutdown_coordinator.closing
         ):
-            raise exceptions.DisabledCommand(interaction.command.qualified_name)
+            return
+        super().dispatch(event_name, *args, **kwargs)
 
     # discord.py's `Client.dispatch` API is both private and *volatile*.
     # This serves as a similar implementation that will not change in the future.
 
     def broadcast(self, event: str, *args, **kwargs):
-        coros: list[Awaitable[None]] = []
-        for addon in self.cogs.values():
-            if event in addon.__receivers__:
-                receiver = addon.__receivers__[event]
-                if not inspect.iscoroutinefunction(receiver):
-                    receiver(addon, *args, **kwargs)
-                else:
-                    coros.append(receiver(addon, *args, **kwargs))
-
-        async def run_coros():
-            await asyncio.gather(*coros)
-
-        asyncio.create_task(run_coros())
+        self.events.dispatch(event, *args, **kwargs)
@@ -40,6 +40,7 @@ class ReminderEditModal(discord.ui.Modal):
         assert self.content.value
 
         self.reminder.content = self.content.value
+        self.addon.autocomplete_indexes.invalidate(self.reminder.user_id)
         await self.addon.bot.db.execute(
             """
             UPDATE reminders
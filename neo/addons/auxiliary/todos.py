@@ -5,13 +5,19 @@ An auxiliary module for the `Todos` addon
 """
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
 
 import discord
 
 from neo.tools.message_helpers import send_confirmation
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     from typing_extensions import Self
 
     from neo.addons.todos import TodoItem, Todos
@@ -54,6 +60,8 @@ class TodoEditModal(discord.ui.Modal):
         assert self.content.value
 
         self.todo.content = self.content.value
+        if (user_todos := self.addon.todos.peek(self.todo.user_id)) is not None:
+            user_todos.invalidate()
 
         # TODO: Uncomment when supported
         # if len(self.category.values) == 1:
@@ -94,3 +102,38 @@ class TodoEditModal(discord.ui.Modal):
         )
 
         await send_confirmation(interaction, ephemeral=True)
+
+
+def parse_todo_import(data: bytes, filename: str) -> Iterator[dict[str, Any]]:
+    """
+    Parses the todos from an exported JSON or CSV file
+
+    Each todo must have `content`, and may have `category` and `created_at`.
+    """
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        rows = json.loads(text)
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of todos")
+    elif filename.lower().endswith(".csv"):
+        rows = csv.DictReader(io.StringIO(text))
+    else:
+        raise ValueError("Todos can only be imported from .json or .csv files")
+
+    for index, row in enumerate(rows, 1):
+        if not isinstance(row, dict) or not row.get("content"):
+            raise ValueError(f"Todo #{index} has no content")
+
+        created_at = datetime.now(timezone.utc)
+        if row.get("created_at"):
+            created_at = datetime.fromisoformat(str(row["created_at"]))
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+
+        yield {
+            "content": str(row["content"]),
+            "category": str(row["category"]).casefold()
+            if row.get("category")
+            else None,
+            "created_at": created_at,
+        }
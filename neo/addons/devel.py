@@ -8,6 +8,7 @@ import discord
 from discord.ext import commands
 
 import neo
+from neo.classes.profiler import PHASES
 from neo.classes.transformers import codeblock_transformer
 from neo.modules import ButtonsMenu, Pages
 from neo.modules.exec import ExecWrapper, env_from_context
@@ -107,7 +108,18 @@ class Devel(neo.Addon):
         ),
     ):
         """Perform an SQL query"""
-        data = await self.bot.db.fetch(query)
+        async with self.bot.db.acquire() as conn:
+            # Manual edits are tagged with a distinct origin, so that the
+            # resulting change notifications are applied by this process too.
+            # It's set for the session rather than a transaction, since some
+            # statements (e.g. VACUUM) can't be run in a transaction block
+            await conn.execute(
+                "SELECT set_config('application_name', 'neo-manual', false)"
+            )
+            try:
+                data = await conn.fetch(query)
+            finally:
+                await conn.execute("RESET application_name")
         if len(data) == 0:
             return await ctx.send("Query executed successfully")
 
@@ -122,6 +134,66 @@ class Devel(neo.Addon):
         menu = ButtonsMenu(pages)
         await menu.start(ctx)
 
+    @commands.command(name="perf")
+    async def dev_perf(
+        self,
+        ctx: NeoContext,
+        action: Optional[
+            Literal["show", "enable", "disable", "reset"]
+        ] = "show",
+        *,
+        command: Optional[str] = None,
+    ):
+        """
+        Inspect app command phase timings
+
+        Profiling must be enabled first, and records the most recent
+        invocations of each command
+        """
+        profiler = self.bot.profiler
+        match action:
+            case "enable" | "disable":
+                profiler.enabled = action == "enable"
+                return await ctx.send_confirmation()
+            case "reset":
+                profiler.reset()
+                return await ctx.send_confirmation()
+
+        profiles = {
+            name: profile
+            for name, profile in profiler.profiles.items()
+            if command is None or name == command
+        }
+        if not profiles:
+            state = "enabled" if profiler.enabled else "disabled"
+            return await ctx.send(f"No profiles recorded (profiling is {state})")
+
+        def total_p95(name: str) -> float:
+            return sum(profiles[name].percentiles(p)[1] for p in PHASES)
+
+        table = Table()
+        table.init_columns(
+            "Command", "Calls", "Errors", "Phase", "p50 ms", "p95 ms", "p99 ms"
+        )
+        for name in sorted(profiles, key=total_p95, reverse=True):
+            profile = profiles[name]
+            for phase in PHASES:
+                if not profile.samples[phase]:
+                    continue
+                table.add_row(
+                    name,
+                    str(profile.calls),
+                    str(profile.errors),
+                    phase,
+                    *(f"{p * 1000:.1f}" for p in profile.percentiles(phase)),
+                )
+
+        pages = Pages(
+            table.display(), 1500, joiner="", prefix="```py\n", suffix="\n```"
+        )
+        menu = ButtonsMenu(pages)
+        await menu.start(ctx)
+
     @commands.command(name="addon")
     async def dev_addon(
         self,
@@ -15,10 +15,11 @@ from discord import app_commands
 
 import neo
 from neo.classes.containers import TimedSet
-from neo.classes.partials import PartialUser
+from neo.classes.shutdown import create_tracked_task
 from neo.classes.timer import periodic
 from neo.modules import ButtonsMenu
 from neo.tools import (
+    AutocompleteIndexCache,
     generate_autocomplete_list,
     is_clear_all,
     is_valid_index,
@@ -27,6 +28,7 @@ from neo.tools import (
 from neo.tools.checks import is_registered_profile_predicate
 
 if TYPE_CHECKING:
+    from neo.classes.coherence import RowChange
     from neo.classes.containers import NeoUser
 
 
@@ -220,25 +222,58 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
         self.highlights: defaultdict[int, list[Highlight]] = defaultdict(list)
         self.grace_periods: dict[int, TimedSet[int]] = {}
         self.queued_highlights: QueuedHighlightsType = defaultdict(dict)
+        self.autocomplete_indexes = AutocompleteIndexCache[int]()
+
+        self.matches_counter = bot.metrics.counter(
+            "neo_highlight_matches_total", "Messages which matched a highlight"
+        )
+        self.deliveries_counter = bot.metrics.counter(
+            "neo_highlight_deliveries_total",
+            "Highlight notifications delivered",
+            ("result",),
+        )
+        bot.metrics.gauge(
+            "neo_highlight_queue_depth", "Highlights queued for delivery"
+        ).set_function(
+            lambda: sum(map(len, self.queued_highlights.values()))
+        )
         asyncio.create_task(self.__ainit__())
 
     async def __ainit__(self):
         await self.bot.wait_until_ready()
 
-        for record in await self.bot.db.fetch("SELECT * FROM highlights"):
+        for record in await self.bot.fetch_initial_records("highlights"):
             self.highlights[record["user_id"]].append(
                 Highlight(self.bot, **record)
             )
 
+        if self.bot.snapshot is not None:
+            self.bot.snapshot.register(
+                "highlights",
+                lambda: (
+                    {"user_id": hl.user_id, "content": hl.content}
+                    for hl in self.flat_highlights
+                ),
+            )
+
         for profile in self.bot.profiles.values():
             self.grace_periods[profile.user_id] = TimedSet(
                 timeout=profile.hl_timeout * 60
             )
 
         self.send_queued_highlights.start()
+        self.bot.shutdown_coordinator.register_flusher(
+            "highlights", self.flush_queued_highlights
+        )
 
     def cog_unload(self):
         self.send_queued_highlights.shutdown()
+        self.bot.shutdown_coordinator.unregister_flusher("highlights")
+
+    async def flush_queued_highlights(self):
+        """Delivers everything still queued, without waiting for the timer"""
+        await self.send_queued_highlights.drain()
+        await self.send_queued_highlights.run_once()
 
     @cached_property  # Cache to avoid being re-computed after every message
     def flat_highlights(self):
@@ -279,6 +314,7 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
             # If the highlight's predicate fails, ignore
             if not await hl.predicate(message):
                 continue
+            self.matches_counter.inc()
             channel_queue = self.queued_highlights[message.channel.id]
             # If the user has no highlights queued for the message's channel,
             # set their value in the channel to a tuple of the relevant data
@@ -300,7 +336,9 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
                 await self.bot.get_user(hl.user_id, as_partial=True).send(
                     **await hl.to_send_kwargs(message, later_triggers)
                 )
+                self.deliveries_counter.inc(result="sent")
             except discord.Forbidden:
+                self.deliveries_counter.inc(result="forbidden")
                 # If a highlight delivery results in a Forbidden response,
                 # then disable highlight receipt for that profile to avoid
                 # wasting future API calls
@@ -324,6 +362,31 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
         if (popped := self.grace_periods.pop(user_id, None)) is not None:
             popped.clear()  # Cleanup TimedSet
         self.highlights.pop(user_id, None)
+        self.autocomplete_indexes.invalidate(user_id)
+        self.recompute_flattened()
+
+    @neo.Addon.recv("remote_change")
+    def handle_remote_change(self, change: RowChange):
+        if change.table != "highlights":
+            return
+
+        # An update may have changed the key, so the old entry is evicted
+        # before the new row is applied
+        old_user_id = change.old_key["user_id"]
+        if (old_highlights := self.highlights.get(old_user_id)) is not None:
+            old_highlights[:] = [
+                hl
+                for hl in old_highlights
+                if hl.content != change.old_key["content"]
+            ]
+            self.autocomplete_indexes.invalidate(old_user_id)
+
+        if change.operation != "DELETE":
+            user_id, content = change.row["user_id"], change.row["content"]
+            user_highlights = self.highlights[user_id]
+            if not any(hl.content == content for hl in user_highlights):
+                user_highlights.append(Highlight(self.bot, **change.row))
+            self.autocomplete_indexes.invalidate(user_id)
         self.recompute_flattened()
 
     async def addon_interaction_check(
@@ -395,6 +458,7 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
         self.highlights[interaction.user.id].append(
             Highlight(self.bot, **result)
         )
+        self.autocomplete_indexes.invalidate(interaction.user.id)
         self.recompute_flattened()
         await send_confirmation(interaction)
 
@@ -433,6 +497,7 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
             interaction.user.id,
             [*map(attrgetter("content"), highlights)],
         )
+        self.autocomplete_indexes.invalidate(interaction.user.id)
         self.recompute_flattened()
         await send_confirmation(interaction)
 
@@ -443,10 +508,11 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
         if interaction.user.id not in self.bot.profiles:
             return []
 
-        highlights = [
-            highlight.content
-            for highlight in self.highlights[interaction.user.id]
-        ]
+        user_id = interaction.user.id
+        highlights = self.autocomplete_indexes.get(
+            user_id,
+            lambda: [hl.content for hl in self.highlights.get(user_id, [])],
+        )
         return generate_autocomplete_list(
             highlights, current, insert_wildcard=True
         )
@@ -506,12 +572,23 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
         """
         profile = self.bot.profiles[interaction.user.id]
 
+        if any(
+            self.bot.display_names.get(id).kind == "unknown"
+            for id in profile.hl_blocks
+        ):
+            # Unknown IDs are fetched as users, which can take a while
+            await interaction.response.defer()
+        names = await self.bot.display_names.resolve(profile.hl_blocks)
+
         def transform_mention(id):
-            mention = getattr(
-                self.bot.get_guild(id),
-                "name",
-                getattr(self.bot.get_channel(id), "mention", f"<@{id}>"),
-            )  # Yes, this could lead to fake user mentions
+            name = names[id]
+            if name.kind == "guild":
+                mention = name.name
+            elif name.kind == "channel":
+                mention = f"<#{id}>"
+            else:
+                # Yes, this could lead to fake user mentions
+                mention = f"<@{id}>"
             return "`{0}` [{1}]".format(id, mention)
 
         menu = ButtonsMenu.from_iterable(
@@ -565,39 +642,37 @@ class Highlights(neo.Addon, app_group=True, group_name="highlight"):
         )
         await send_confirmation(interaction)
 
+    async def _resolve_blocks(self, user_id: int, ids: list[int]):
+        await self.bot.display_names.resolve(ids)
+        # Results cached before now still show these IDs as unknown
+        self.bot.autocomplete.invalidate_user(user_id)
+
     @highlight_unblock.autocomplete("id")
     async def highlight_unblock_autocomplete(
         self, interaction: discord.Interaction, current: str
     ):
         profile = self.bot.profiles[interaction.user.id]
+        matching = [
+            block for block in profile.hl_blocks if current in str(block)
+        ][:25]
 
-        def transform_mention(id):
-            mention: Optional[
-                discord.Guild
-                | discord.TextChannel
-                | PartialUser
-                | discord.User
-                | str
-            ] = getattr(
-                self.bot.get_guild(id),
-                "name",
-                getattr(
-                    self.bot.get_channel(id),
-                    "name",
-                    getattr(self.bot.get_user(id), "name"),
-                ),
+        names = [*map(self.bot.display_names.get, matching)]
+        if unknown := [name.id for name in names if name.kind == "unknown"]:
+            # Fetching users could easily take longer than Discord allows
+            # for a response, so they're fetched in the background and
+            # shown once they're known
+            create_tracked_task(
+                self._resolve_blocks(interaction.user.id, unknown),
+                name="highlight-resolve-blocks",
             )
 
-            return "{0} [{1}]".format(id, mention or "Unknown")
-
         return [
             discord.app_commands.Choice(
-                name=transform_mention(_id), value=str(_id)
+                name="{0} [{1}]".format(name.id, name.name or "Unknown"),
+                value=str(name.id),
             )
-            for _id in filter(
-                lambda block: current in block, map(str, profile.hl_blocks)
-            )
-        ][:25]
+            for name in names
+        ]
 
 
 async def setup(bot: neo.Neo):
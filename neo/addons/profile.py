@@ -25,12 +25,17 @@ from neo.tools import (
     prompt_user,
 )
 from neo.tools.checks import is_registered_profile_predicate
+from neo.tools.timezones import timezones
 
 from .auxiliary.profile import ChangeSettingButton, ResetSettingButton
 
 SETTINGS_MAPPING = SettingsMapping(
     Setting("receive_highlights", transformer=bool_transformer),
-    Setting("timezone", transformer=timezone_transformer),
+    Setting(
+        "timezone",
+        transformer=timezone_transformer,
+        autocomplete_func=lambda _, current: timezones.search(current),
+    ),
     Setting(
         "hl_timeout",
         transformer=timeout_transformer,
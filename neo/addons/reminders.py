@@ -5,6 +5,7 @@ from __future__ import annotations
 import asyncio
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any
 from uuid import UUID, uuid4
 
 import discord
@@ -15,6 +16,7 @@ from neo.classes.app_commands import no_defer
 from neo.classes.timer import periodic
 from neo.modules import ButtonsMenu
 from neo.tools import (
+    AutocompleteIndexCache,
     generate_autocomplete_list,
     is_clear_all,
     is_valid_index,
@@ -23,6 +25,7 @@ from neo.tools import (
     try_or_none,
 )
 from neo.tools.checks import is_registered_profile_predicate
+from neo.tools.text_search import HEADLINE_OPTIONS, format_headline
 from neo.tools.time_parse import (
     TimedeltaWithYears,
     humanize_timedelta,
@@ -32,6 +35,9 @@ from neo.tools.time_parse import (
 
 from .auxiliary.reminders import ReminderEditModal
 
+if TYPE_CHECKING:
+    from neo.classes.coherence import RowChange
+
 # Maximum number of reminders per user
 MAX_REMINDERS = 15
 # Max number of characters in a reminder's content
@@ -73,6 +79,16 @@ class Reminder:
         self.bot = bot
         self._done = False
 
+    def to_record(self) -> dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "reminder_id": self.reminder_id,
+            "content": self.content,
+            "epoch": self.epoch,
+            "delta": self.delta,
+            "repeating": self.repeating,
+        }
+
     @property
     def end_time(self):
         return self.epoch + self.delta
@@ -167,19 +183,42 @@ class Reminders(neo.Addon, app_group=True, group_name="remind"):
     def __init__(self, bot: neo.Neo):
         self.bot = bot
         self.reminders: dict[int, list[Reminder]] = defaultdict(list)
+        self.autocomplete_indexes = AutocompleteIndexCache[int]()
+
+        bot.metrics.gauge(
+            "neo_reminders_pending", "Reminders waiting to be delivered"
+        ).set_function(lambda: sum(map(len, self.reminders.values())))
         asyncio.create_task(self.__ainit__())
 
     async def __ainit__(self):
         await self.bot.wait_until_ready()
 
-        for record in await self.bot.db.fetch("SELECT * FROM reminders"):
+        for record in await self.bot.fetch_initial_records("reminders"):
             reminder = Reminder(bot=self.bot, **record)
             self.reminders[record["user_id"]].append(reminder)
 
-        self.poll_reminders.start()
+        if self.bot.snapshot is not None:
+            self.bot.snapshot.register("reminders", self.snapshot_records)
+
+        # In a sharded deployment, only the process that owns user data
+        # delivers reminders, so that they aren't delivered once per process
+        if self.bot.user_data_owner:
+            self.poll_reminders.start()
+            self.sync_due_reminders.start()
+            # Lets deliveries that are already underway finish on shutdown
+            self.bot.shutdown_coordinator.register_flusher(
+                "reminders", self.poll_reminders.drain
+            )
+
+    def snapshot_records(self):
+        for reminder_list in self.reminders.values():
+            for reminder in reminder_list:
+                if not reminder._done:
+                    yield reminder.to_record()
 
     @neo.Addon.recv("profile_delete")
     async def handle_deleted_profile(self, user_id: int):
+        self.autocomplete_indexes.invalidate(user_id)
         for reminder in self.reminders.pop(user_id, []):
             await reminder.delete()
 
@@ -188,6 +227,36 @@ class Reminders(neo.Addon, app_group=True, group_name="remind"):
         self.reminders[user_id] = [
             *filter(lambda r: not r._done, self.reminders[user_id].copy())
         ]
+        self.autocomplete_indexes.invalidate(user_id)
+
+    @neo.Addon.recv("remote_change")
+    async def handle_remote_change(self, change: RowChange):
+        if change.table != "reminders":
+            return
+
+        user_reminders = self.reminders[change.row["user_id"]]
+        self.autocomplete_indexes.invalidate(change.row["user_id"])
+        existing = next(
+            (
+                r
+                for r in user_reminders
+                if r.reminder_id == change.row["reminder_id"]
+            ),
+            None,
+        )
+
+        if change.operation == "DELETE":
+            if existing is not None:
+                existing._done = True
+                user_reminders.remove(existing)
+            return
+
+        if existing is None:
+            user_reminders.append(Reminder(bot=self.bot, **change.row))
+        else:
+            existing.content = change.row["content"]
+            existing.epoch = change.row["epoch"]
+            existing.delta = change.row["delta"]
 
     @periodic(1)
     async def poll_reminders(self):
@@ -196,8 +265,36 @@ class Reminders(neo.Addon, app_group=True, group_name="remind"):
             for reminder in reminder_list:
                 await reminder.poll(now)
 
+    @periodic(60)
+    async def sync_due_reminders(self):
+        # Reminders set on other processes normally arrive as remote
+        # changes, but a notification can be missed (e.g. while the
+        # listener is reconnecting). Due reminders are read from the
+        # database too, so that a missed one is still delivered
+        known = {
+            reminder.reminder_id
+            for reminder_list in self.reminders.values()
+            for reminder in reminder_list
+        }
+        for record in await self.bot.db.fetch(
+            """
+            SELECT
+                *
+            FROM
+                reminders
+            WHERE
+                epoch + delta <= NOW()
+            """
+        ):
+            if record["reminder_id"] not in known:
+                reminder = Reminder(bot=self.bot, **record)
+                self.reminders[record["user_id"]].append(reminder)
+                self.autocomplete_indexes.invalidate(record["user_id"])
+
     def cog_unload(self):
         self.poll_reminders.shutdown()
+        self.sync_due_reminders.shutdown()
+        self.bot.shutdown_coordinator.unregister_flusher("reminders")
 
     async def add_reminder(
         self,
@@ -231,6 +328,13 @@ class Reminders(neo.Addon, app_group=True, group_name="remind"):
         )
         reminder = Reminder(bot=self.bot, **data)
         self.reminders[user_id].append(reminder)
+        self.autocomplete_indexes.invalidate(user_id)
+
+    def get_autocomplete_index(self, user_id: int):
+        return self.autocomplete_indexes.get(
+            user_id,
+            lambda: [rem.content for rem in self.reminders.get(user_id, [])],
+        )
 
     async def addon_interaction_check(
         self, interaction: discord.Interaction
@@ -392,6 +496,64 @@ class Reminders(neo.Addon, app_group=True, group_name="remind"):
         )
         await menu.start(interaction)
 
+    @app_commands.command(name="search")
+    @app_commands.describe(
+        query='What to search for, supports "quoted phrases", or, and -exclusions'
+    )
+    async def remind_search(
+        self,
+        interaction: discord.Interaction,
+        query: app_commands.Range[str, 1, 200],
+    ):
+        """Search the content of your reminders"""
+        records = await self.bot.db.fetch(
+            """
+            SELECT
+                reminder_id,
+                ts_headline('english', content, search_query, $3) AS headline
+            FROM
+                reminders,
+                websearch_to_tsquery('english', $2) AS search_query
+            WHERE
+                user_id=$1 AND
+                to_tsvector('english', content) @@ search_query
+            ORDER BY
+                ts_rank(to_tsvector('english', content), search_query) DESC
+            LIMIT 25
+            """,
+            interaction.user.id,
+            query,
+            HEADLINE_OPTIONS,
+        )
+
+        # Results are listed by the same indices as `/remind list`
+        positions = {
+            reminder.reminder_id: index
+            for index, reminder in enumerate(
+                self.reminders[interaction.user.id], 1
+            )
+        }
+        results = [
+            "`{0}` {1}".format(
+                positions[record["reminder_id"]],
+                format_headline(record["headline"]),
+            )
+            for record in records
+            if record["reminder_id"] in positions
+        ]
+
+        menu = ButtonsMenu.from_iterable(
+            results or ["No matching reminders"],
+            per_page=5,
+            use_embed=True,
+            template_embed=neo.Embed().set_author(
+                name=f"{interaction.user}'s reminders matching "
+                f'"{shorten(query, 50)}"',
+                icon_url=interaction.user.display_avatar,
+            ),
+        )
+        await menu.start(interaction)
+
     @app_commands.command(name="view")
     @app_commands.rename(index="reminder")
     @app_commands.describe(index="A reminder index to view")
@@ -449,7 +611,7 @@ class Reminders(neo.Addon, app_group=True, group_name="remind"):
         if interaction.user.id not in self.bot.profiles:
             return []
 
-        reminders = [rem.content for rem in self.reminders[interaction.user.id]]
+        reminders = self.get_autocomplete_index(interaction.user.id)
         return generate_autocomplete_list(reminders, current)
 
     @app_commands.command(name="cancel")
@@ -484,7 +646,7 @@ class Reminders(neo.Addon, app_group=True, group_name="remind"):
         if interaction.user.id not in self.bot.profiles:
             return []
 
-        reminders = [rem.content for rem in self.reminders[interaction.user.id]]
+        reminders = self.get_autocomplete_index(interaction.user.id)
         return generate_autocomplete_list(
             reminders, current, insert_wildcard=True
         )
@@ -4,13 +4,18 @@ from __future__ import annotations
 
 import asyncio
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 import discord
 from discord import app_commands
 
 import neo
-from neo.classes.containers import Setting, SettingsMapping, TimedCache
+from neo.classes.containers import (
+    CacheStats,
+    Setting,
+    SettingsMapping,
+    TimedCache,
+)
 from neo.classes.transformers import (
     max_days_transformer,
     text_channel_transformer,
@@ -29,14 +34,17 @@ from .auxiliary.starboard import ChangeSettingButton
 if TYPE_CHECKING:
     from asyncpg import Pool
 
+    from neo.classes.coherence import RowChange
+
 SETTINGS_MAPPING = SettingsMapping(
     Setting(
         "channel",
         transformer=text_channel_transformer,
         name_override="Starboard Channel",
-        autocomplete_func=lambda interaction, _: [
+        autocomplete_func=lambda interaction, current: [
             (f"#{channel}", channel.mention)
             for channel in interaction.guild.text_channels  # type: ignore  # guild_only
+            if current.casefold() in f"#{channel}".casefold()
         ],
     ),
     Setting(
@@ -86,6 +94,7 @@ class Starboard:
         "ignored",
         "star_ids",
         "cached_stars",
+        "cache_stats",
         "lock",
         "pool",
     )
@@ -101,6 +110,7 @@ class Starboard:
         emoji: discord.PartialEmoji,
         ignored: set[int],
         pool: Pool,
+        cache_stats: CacheStats,
     ):
         self.channel = channel
         self.threshold = threshold
@@ -113,14 +123,26 @@ class Starboard:
         # Use timed cache so that stars are not persisting for
         # longer than they reasonably should be
         self.cached_stars = TimedCache[int, Star](300)
+        self.cache_stats = cache_stats
         self.lock = asyncio.Lock()
         self.pool = pool
 
+    def to_record(self, guild_id: int) -> dict[str, Any]:
+        return {
+            "guild_id": guild_id,
+            "channel": getattr(self.channel, "id", None),
+            "threshold": self.threshold,
+            "format": self.format,
+            "max_days": self.max_days,
+            "emoji": str(self.emoji),
+            "ignored": [*self.ignored],
+        }
+
     async def get_star(self, id: int) -> Star | None:
         if not self.channel:
             return None
 
-        if id in self.cached_stars:
+        if self.cache_stats.record(id in self.cached_stars):
             return self.cached_stars[id]
 
         star_data = await self.pool.fetchrow(
@@ -276,6 +298,10 @@ class StarboardAddon(
         self.ready = False
         self.starboards: dict[int, Starboard] = {}
 
+        # Shared by every starboard, and exported with the bot's own caches
+        self.star_cache_stats = CacheStats()
+        bot.cache_stats["stars"] = self.star_cache_stats
+
         asyncio.create_task(self.__ainit__())
 
     async def __ainit__(self):
@@ -283,7 +309,7 @@ class StarboardAddon(
 
         # Setup starboards
         starboard_settings = {}
-        for record in await self.bot.db.fetch("SELECT * FROM starboards"):
+        for record in await self.bot.fetch_initial_records("starboards"):
             starboard_settings[record["guild_id"]] = record
 
         for guild_id in self.bot.configs.keys():
@@ -296,6 +322,15 @@ class StarboardAddon(
             )
         self.ready = True
 
+        if self.bot.snapshot is not None:
+            self.bot.snapshot.register(
+                "starboards",
+                lambda: (
+                    starboard.to_record(guild_id)
+                    for guild_id, starboard in self.starboards.items()
+                ),
+            )
+
         # Initialize settings
         for col_name in SETTINGS_MAPPING.keys():
             col_desc = await self.bot.db.fetchval(
@@ -330,6 +365,7 @@ class StarboardAddon(
             emoji=discord.PartialEmoji.from_str(starboard_settings["emoji"]),
             ignored=set(starboard_settings["ignored"]),
             pool=self.bot.db,
+            cache_stats=self.star_cache_stats,
         )
 
     # Sect: Event handling
@@ -472,8 +508,37 @@ class StarboardAddon(
             )
 
     @neo.Addon.recv("config_delete")
-    async def handle_deleted_config(self, guild_id: int):
-        self.starboards.pop(guild_id, None)
+    def handle_deleted_configs(self, guild_ids: frozenset[int]):
+        for guild_id in guild_ids:
+            self.starboards.pop(guild_id, None)
+
+    @neo.Addon.recv("remote_change")
+    async def handle_remote_change(self, change: RowChange):
+        if change.table != "starboards":
+            return
+
+        guild_id = change.row["guild_id"]
+        if not self.bot.owns_guild(guild_id):
+            return
+
+        if change.operation == "DELETE":
+            self.starboards.pop(guild_id, None)
+            return
+
+        if (starboard := self.starboards.get(guild_id)) is None:
+            self.starboards[guild_id] = await self.create_starboard(
+                guild_id, change.row
+            )
+            return
+
+        if getattr(starboard.channel, "id", None) != change.row["channel"]:
+            starboard.channel = self.bot.get_channel(change.row["channel"])  # type: ignore
+            starboard.cached_stars.clear()
+        starboard.threshold = change.row["threshold"]
+        starboard.format = change.row["format"]
+        starboard.max_days = change.row["max_days"]
+        starboard.emoji = discord.PartialEmoji.from_str(change.row["emoji"])
+        starboard.ignored = set(change.row["ignored"])
 
     # /Sect: Event Handling
     # Sect: Commands
@@ -720,10 +785,8 @@ class StarboardAddon(
 
         formatted: list[str] = []
         for id in starboard.ignored:
-            if isinstance(
-                channel := self.bot.get_channel(id), discord.abc.GuildChannel
-            ):
-                formatted.insert(0, f"**Channel** {channel.mention}")
+            if self.bot.display_names.get(id).kind == "channel":
+                formatted.insert(0, f"**Channel** <#{id}>")
             else:
                 formatted.append(f"**Message ID** `{id}`")
 
@@ -3,10 +3,13 @@
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
+import io
+import json
+from bisect import insort
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timezone
 from operator import attrgetter
-from typing import Optional
+from typing import TYPE_CHECKING, Literal, Optional
 from uuid import UUID, uuid4
 
 import discord
@@ -14,10 +17,11 @@ from discord import app_commands
 from discord.utils import escape_markdown
 
 import neo
-from neo.addons.auxiliary.todos import TodoEditModal
+from neo.addons.auxiliary.todos import TodoEditModal, parse_todo_import
 from neo.classes.app_commands import no_defer
-from neo.modules import ButtonsMenu
+from neo.modules import ButtonsMenu, QueryPageSource
 from neo.tools import (
+    AutocompleteIndex,
     generate_autocomplete_list,
     instantiate,
     is_clear_all,
@@ -27,10 +31,18 @@ from neo.tools import (
     with_docstring,
 )
 from neo.tools.checks import is_registered_profile_predicate
+from neo.tools.text_search import HEADLINE_OPTIONS, format_headline
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from neo.classes.coherence import RowChange
 
 MAX_TODOS = 100
 MAX_TODO_CATEGORIES = 10
 MAX_CATEGORY_LEN = 100
+# Maximum size in bytes of an imported todo file
+MAX_IMPORT_SIZE = 1024 * 1024
 
 
 class TodoItem:
@@ -58,24 +70,290 @@ class TodoItem:
         ).format(self)
 
 
+class TodoList:
+    """
+    A single user's todos, indexed by ID and by category
+
+    Todos keep the order they were added in, both overall and within each
+    category. Rendered list lines are cached per category filter until any
+    of the user's todos change, as is the autocomplete index.
+    """
+
+    __slots__ = (
+        "by_id",
+        "categories",
+        "sequence",
+        "_next_seq",
+        "_ordered",
+        "_rendered",
+        "_autocomplete",
+    )
+
+    def __init__(self, todos: Iterable[TodoItem] = ()):
+        self.by_id: dict[UUID, TodoItem] = {}
+        self.categories: dict[str | None, list[TodoItem]] = {}
+        self.sequence: dict[UUID, int] = {}
+        self._next_seq = 0
+        self._ordered: Optional[list[TodoItem]] = None
+        self._rendered: dict[str | None, list[str]] = {}
+        self._autocomplete: Optional[AutocompleteIndex] = None
+
+        for todo in todos:
+            self.add(todo)
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} todos={1}>".format(self, len(self))
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __getitem__(self, index: int) -> TodoItem:
+        return self.ordered[index]
+
+    @property
+    def ordered(self) -> list[TodoItem]:
+        if self._ordered is None:
+            self._ordered = [*self.by_id.values()]
+        return self._ordered
+
+    @property
+    def autocomplete(self) -> AutocompleteIndex:
+        if self._autocomplete is None:
+            self._autocomplete = AutocompleteIndex(
+                todo.content for todo in self.ordered
+            )
+        return self._autocomplete
+
+    def invalidate(self):
+        """Drops cached renders, for when a todo is modified in place"""
+        self._rendered.clear()
+        self._autocomplete = None
+
+    def add(self, todo: TodoItem):
+        self.by_id[todo.todo_id] = todo
+        self.sequence[todo.todo_id] = self._next_seq
+        self._next_seq += 1
+        self.categories.setdefault(todo.category, []).append(todo)
+
+        if self._ordered is not None:
+            self._ordered.append(todo)
+        self.invalidate()
+
+    def remove(self, todo_id: UUID) -> TodoItem:
+        todo = self.by_id.pop(todo_id)
+        del self.sequence[todo_id]
+        self._remove_from_category(todo)
+
+        self._ordered = None
+        self.invalidate()
+        return todo
+
+    def pop(self, index: int) -> TodoItem:
+        return self.remove(self.ordered[index].todo_id)
+
+    def clear(self):
+        self.by_id.clear()
+        self.categories.clear()
+        self.sequence.clear()
+        self._ordered = None
+        self.invalidate()
+
+    def get_category(self, category: str | None) -> list[TodoItem]:
+        return self.categories.get(category, [])
+
+    def set_category(self, todo: TodoItem, category: str | None):
+        if todo.category == category:
+            return
+
+        self._remove_from_category(todo)
+        todo.category = category
+        insort(
+            self.categories.setdefault(category, []),
+            todo,
+            key=lambda t: self.sequence[t.todo_id],
+        )
+        self.invalidate()
+
+    def remove_category(
+        self, category: str, *, delete_todos: bool = False
+    ) -> list[TodoItem]:
+        """
+        Removes every todo from a category, either deleting the todos or
+        moving them to be uncategorized
+        """
+        todos = self.categories.pop(category, [])
+        if delete_todos:
+            for todo in todos:
+                del self.by_id[todo.todo_id]
+                del self.sequence[todo.todo_id]
+            self._ordered = None
+        else:
+            for todo in todos:
+                todo.category = None
+            uncategorized = self.categories.setdefault(None, [])
+            uncategorized.extend(todos)
+            uncategorized.sort(key=lambda t: self.sequence[t.todo_id])
+
+        self.invalidate()
+        return todos
+
+    def render(self, category: Optional[str] = None) -> list[str]:
+        """
+        Returns the lines listing this user's todos, optionally restricted
+        to a single category
+        """
+        if (lines := self._rendered.get(category)) is None:
+            lines = self._rendered[category] = self._render(category)
+        return lines
+
+    def _render(self, category: Optional[str]) -> list[str]:
+        formatted_todos: dict[str | None, list[str]] = defaultdict(list)
+
+        todos = (
+            self.ordered if category is None else self.get_category(category)
+        )
+        for index, todo in enumerate(todos, 1):
+            formatted_todos[todo.category].append(
+                "`{0}` {1}".format(
+                    index, escape_markdown(shorten(todo.content, width=75))
+                )
+            )
+
+        output: list[str] = []
+        for cat, cat_fmted_todos in sorted(
+            formatted_todos.items(), key=lambda x: x[0] is None, reverse=True
+        ):
+            if len(cat_fmted_todos) == 0:
+                continue
+
+            cat_name = f"**{(cat or 'Uncategorized').title()}**:"
+            output.append(
+                "{0}\n{1}".format(cat_name, "\n".join(cat_fmted_todos))
+            )
+
+        return "\n\n".join(output).splitlines(keepends=True)
+
+    def _remove_from_category(self, todo: TodoItem):
+        category = self.categories[todo.category]
+        category.remove(todo)
+        if not category:
+            del self.categories[todo.category]
+
+
+class TodoCache:
+    """
+    Loads users' todos on first access
+
+    Only the `capacity` most recently accessed users' todos are kept in
+    memory. Concurrent first accesses for the same user share a single
+    query.
+    """
+
+    __slots__ = ("bot", "capacity", "lists", "pending", "stale")
+
+    def __init__(self, bot: neo.Neo, *, capacity: int = 1000):
+        self.bot = bot
+        self.capacity = capacity
+        self.lists: OrderedDict[int, TodoList] = OrderedDict()
+        self.pending: dict[int, asyncio.Task[TodoList]] = {}
+        # Users whose todos changed while they were being loaded
+        self.stale: set[int] = set()
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} loaded={1}>".format(
+            self, len(self.lists)
+        )
+
+    async def get(self, user_id: int) -> TodoList:
+        if (todos := self.lists.get(user_id)) is not None:
+            self.lists.move_to_end(user_id)
+            return todos
+
+        if (task := self.pending.get(user_id)) is None:
+            task = self.pending[user_id] = asyncio.create_task(
+                self._load(user_id)
+            )
+        # Shielded so that one cancelled caller can't cancel the load for
+        # everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def peek(self, user_id: int) -> Optional[TodoList]:
+        """Returns a user's todos only if they're already loaded"""
+        return self.lists.get(user_id)
+
+    def mark_stale(self, user_id: int):
+        if user_id in self.pending:
+            self.stale.add(user_id)
+
+    def discard(self, user_id: int):
+        self.lists.pop(user_id, None)
+        self.mark_stale(user_id)
+
+    async def _load(self, user_id: int) -> TodoList:
+        try:
+            while True:
+                self.stale.discard(user_id)
+                records = await self.bot.db.fetch(
+                    """
+                    SELECT * FROM todos
+                    WHERE
+                        user_id=$1
+                    ORDER BY
+                        created_at
+                    """,
+                    user_id,
+                )
+                # Reload if the todos changed during the query, since the
+                # results may predate the change
+                if user_id not in self.stale:
+                    break
+
+            todos = TodoList(TodoItem(**record) for record in records)
+            self.lists[user_id] = todos
+            while len(self.lists) > self.capacity:
+                self.lists.popitem(last=False)
+            return todos
+        finally:
+            self.pending.pop(user_id, None)
+
+
 class Todos(neo.Addon, app_group=True, group_name="todo"):
     """Commands for managing a todo list"""
 
     def __init__(self, bot: neo.Neo):
         self.bot = bot
-        self.todos: defaultdict[int, list[TodoItem]] = defaultdict(list)
-        asyncio.create_task(self.__ainit__())
-
-    async def __ainit__(self):
-        await self.bot.wait_until_ready()
-
-        for record in await self.bot.db.fetch("SELECT * FROM todos"):
-            self.todos[record["user_id"]].append(TodoItem(**record))
+        self.todos = TodoCache(bot)
 
     # Need to dynamically account for deleted profiles
     @neo.Addon.recv("profile_delete")
     async def handle_deleted_profile(self, user_id: int):
-        self.todos.pop(user_id, None)
+        self.todos.discard(user_id)
+
+    @neo.Addon.recv("remote_change")
+    def handle_remote_change(self, change: RowChange):
+        if change.table != "todos":
+            return
+
+        user_id = change.row["user_id"]
+        if (user_todos := self.todos.peek(user_id)) is None:
+            # Not loaded, so it'll be read fresh on first access
+            self.todos.mark_stale(user_id)
+            return
+
+        existing = user_todos.by_id.get(change.row["todo_id"])
+
+        match change.operation:
+            case "INSERT" if existing is None:
+                user_todos.add(TodoItem(**change.row))
+            case "UPDATE" if existing is not None:
+                existing.content = change.row["content"]
+                user_todos.set_category(existing, change.row["category"])
+                user_todos.invalidate()
+            case "DELETE" if existing is not None:
+                user_todos.remove(existing.todo_id)
 
     async def addon_interaction_check(
         self, interaction: discord.Interaction
@@ -101,39 +379,11 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
         self, interaction: discord.Interaction, category: Optional[str] = None
     ):
         """List your todos"""
-        formatted_todos: dict[str | None, list[str]] = defaultdict(list)
-
-        todos: list[TodoItem] = []
-        if category is None:
-            todos = self.todos[interaction.user.id]
-        else:
-            todos = [
-                todo
-                for todo in self.todos[interaction.user.id]
-                if todo.category == category
-            ]
-
-        for index, todo in enumerate(todos, 1):
-            formatted_todos[todo.category].append(
-                "`{0}` {1}".format(
-                    index, escape_markdown(shorten(todo.content, width=75))
-                )
-            )
-
-        output: list[str] = []
-        for cat, cat_fmted_todos in sorted(
-            formatted_todos.items(), key=lambda x: x[0] is None, reverse=True
-        ):
-            if len(cat_fmted_todos) == 0:
-                continue
-
-            cat_name = f"**{(cat or 'Uncategorized').title()}**:"
-            output.append(
-                "{0}\n{1}".format(cat_name, "\n".join(cat_fmted_todos))
-            )
+        user_todos = await self.todos.get(interaction.user.id)
+        lines = user_todos.render(category)
 
         menu = ButtonsMenu.from_iterable(
-            "\n\n".join(output).splitlines(keepends=True) or ["No todos"],
+            lines or ["No todos"],
             per_page=10,
             use_embed=True,
             joiner="",
@@ -156,7 +406,8 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
         category: Optional[str] = None,
     ):
         """Add a new todo"""
-        if len(self.todos[interaction.user.id]) >= MAX_TODOS:
+        user_todos = await self.todos.get(interaction.user.id)
+        if len(user_todos) >= MAX_TODOS:
             raise ValueError("You've used up all your todo slots!")
 
         if len(content) > 1500:
@@ -187,7 +438,7 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
             *data.values(),
         )
 
-        self.todos[interaction.user.id].append(TodoItem(**data))
+        user_todos.add(TodoItem(**data))
         await send_confirmation(interaction)
 
     @todo_list.autocomplete("category")
@@ -206,13 +457,14 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
         index: str,
     ):
         """Remove a todo by index"""
+        user_todos = await self.todos.get(interaction.user.id)
         if is_clear_all(index):
-            todos = self.todos[interaction.user.id].copy()
-            self.todos[interaction.user.id].clear()
+            todos = [*user_todos]
+            user_todos.clear()
 
         elif is_valid_index(index):
             try:
-                todos = [self.todos[interaction.user.id].pop(int(index) - 1)]
+                todos = [user_todos.pop(int(index) - 1)]
             except IndexError:
                 raise IndexError(
                     "One or more of the provided indices is invalid."
@@ -239,8 +491,176 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
         if interaction.user.id not in self.bot.profiles:
             return []
 
-        todos = [todo.content for todo in self.todos[interaction.user.id]]
-        return generate_autocomplete_list(todos, current, insert_wildcard=True)
+        user_todos = await self.todos.get(interaction.user.id)
+        return generate_autocomplete_list(
+            user_todos.autocomplete, current, insert_wildcard=True
+        )
+
+    @app_commands.command(name="search")
+    @app_commands.describe(
+        query='What to search for, supports "quoted phrases", or, and -exclusions'
+    )
+    async def todo_search(
+        self,
+        interaction: discord.Interaction,
+        query: app_commands.Range[str, 1, 200],
+    ):
+        """Search the content of your todos"""
+        user_todos = await self.todos.get(interaction.user.id)
+
+        # Results are listed by the same indices as `/todo list`
+        positions = {
+            todo.todo_id: index
+            for index, todo in enumerate(user_todos.ordered, 1)
+        }
+
+        def format_result(record) -> str:
+            return "`{0}` {1}".format(
+                positions.get(record["todo_id"], "?"),
+                format_headline(record["headline"]),
+            )
+
+        # Headlines are only generated for the pages that are viewed
+        source = QueryPageSource(
+            self.bot.db,
+            """
+            SELECT
+                todo_id,
+                ts_headline('english', content, search_query, $3) AS headline
+            FROM
+                todos,
+                websearch_to_tsquery('english', $2) AS search_query
+            WHERE
+                user_id=$1 AND
+                to_tsvector('english', content) @@ search_query
+            ORDER BY
+                ts_rank(to_tsvector('english', content), search_query) DESC,
+                created_at
+            """,
+            interaction.user.id,
+            query,
+            HEADLINE_OPTIONS,
+            formatter=format_result,
+            per_page=10,
+            use_embed=True,
+            empty="No matching todos",
+            template_embed=neo.Embed().set_author(
+                name=f"{interaction.user}'s todos matching "
+                f'"{shorten(query, 50)}"',
+                icon_url=interaction.user.display_avatar,
+            ),
+        )
+        menu = ButtonsMenu(source)
+        await menu.start(interaction)
+
+    @app_commands.command(name="export")
+    @app_commands.describe(format="The file format to export to")
+    async def todo_export(
+        self,
+        interaction: discord.Interaction,
+        format: Literal["json", "csv"] = "json",
+    ):
+        """Export your todos to a file"""
+        query = """
+            SELECT
+                content,
+                category,
+                created_at
+            FROM
+                todos
+            WHERE
+                user_id=$1
+            ORDER BY
+                created_at
+            """
+        buffer = io.BytesIO()
+
+        async with self.bot.db.acquire() as conn:
+            if format == "csv":
+
+                async def write(chunk: bytes):
+                    buffer.write(chunk)
+
+                await conn.copy_from_query(
+                    query,
+                    interaction.user.id,
+                    output=write,
+                    format="csv",
+                    header=True,
+                )
+
+            else:
+                # Rows are written out as they're read from the cursor,
+                # rather than being collected first
+                separator = b"["
+                async with conn.transaction():
+                    async for record in conn.cursor(query, interaction.user.id):
+                        buffer.write(separator)
+                        buffer.write(
+                            json.dumps(
+                                dict(record), default=datetime.isoformat
+                            ).encode()
+                        )
+                        separator = b","
+                buffer.write(b"]" if separator == b"," else b"[]")
+
+        buffer.seek(0)
+        await interaction.response.send_message(
+            file=discord.File(buffer, filename=f"todos.{format}")
+        )
+
+    @app_commands.command(name="import")
+    @app_commands.describe(
+        file="A .json or .csv file of todos, in the same format as /todo export"
+    )
+    async def todo_import(
+        self, interaction: discord.Interaction, file: discord.Attachment
+    ):
+        """Import todos from a file"""
+        if file.size > MAX_IMPORT_SIZE:
+            raise ValueError("That file is too large to import.")
+
+        user_todos = await self.todos.get(interaction.user.id)
+        categories = set(self.bot.profiles[interaction.user.id].todo_categories)
+
+        todos: list[TodoItem] = []
+        uncategorized = 0
+        for row in parse_todo_import(await file.read(), file.filename):
+            if len(row["content"]) > 1500:
+                raise ValueError(
+                    "Todo content may be no more than 1500 characters long"
+                )
+            if row["category"] is not None and row["category"] not in categories:
+                row["category"] = None
+                uncategorized += 1
+            todos.append(
+                TodoItem(user_id=interaction.user.id, todo_id=uuid4(), **row)
+            )
+
+        if len(user_todos) + len(todos) > MAX_TODOS:
+            raise ValueError(
+                f"You only have {MAX_TODOS - len(user_todos)} todo slots left!"
+            )
+
+        await self.bot.db.copy_records_to_table(
+            "todos",
+            records=(
+                (t.user_id, t.content, t.todo_id, t.created_at, t.category)
+                for t in todos
+            ),
+            columns=("user_id", "content", "todo_id", "created_at", "category"),
+        )
+        # Imported todos keep their creation times, so they're reloaded to
+        # be listed in the same order as they will be from the database
+        self.todos.discard(interaction.user.id)
+
+        message = f"Imported {len(todos)} todo(s)."
+        if uncategorized:
+            message += (
+                f" {uncategorized} todo(s) were in categories you haven't "
+                "created, and were left uncategorized."
+            )
+        await interaction.response.send_message(message)
 
     @app_commands.command(name="view")
     @app_commands.rename(index="todo")
@@ -248,7 +668,7 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
     async def todo_view(self, interaction: discord.Interaction, index: int):
         """View a todo by its listed index"""
         try:
-            todo = self.todos[interaction.user.id][index - 1]
+            todo = (await self.todos.get(interaction.user.id))[index - 1]
         except IndexError:
             raise IndexError("Couldn't find that todo.")
 
@@ -279,7 +699,9 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
     async def todo_edit(self, interaction: discord.Interaction, index: int):
         """Edit the content of a todo"""
         try:
-            todo: TodoItem = self.todos[interaction.user.id][index - 1]
+            todo: TodoItem = (await self.todos.get(interaction.user.id))[
+                index - 1
+            ]
         except IndexError:
             raise IndexError("Couldn't find that todo.")
 
@@ -300,8 +722,8 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
         if interaction.user.id not in self.bot.profiles:
             return []
 
-        todos = [todo.content for todo in self.todos[interaction.user.id]]
-        return generate_autocomplete_list(todos, current)
+        user_todos = await self.todos.get(interaction.user.id)
+        return generate_autocomplete_list(user_todos.autocomplete, current)
 
     @instantiate
     class Category(app_commands.Group):
@@ -345,7 +767,7 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
 
             _name = category_name.casefold()
             if _name not in profile.todo_categories:
-                profile.todo_categories += [_name]
+                await profile.add_todo_category(_name)
             await send_confirmation(interaction)
 
         @app_commands.command(name="remove")
@@ -369,35 +791,23 @@ class Todos(neo.Addon, app_group=True, group_name="todo"):
 
             _name = category_name.casefold()
             if delete_associated:
-                query = """
+                await self.addon.bot.db.execute(
+                    """
                     DELETE FROM
                         todos
                     WHERE
                         user_id=$1 AND
                         category=$2
-                    """
-            else:
-                query = """
-                    UPDATE todos
-                    SET category=NULL
-                    WHERE
-                        user_id=$1 AND
-                        category=$2
-                    """
+                    """,
+                    interaction.user.id,
+                    _name,
+                )
+            user_todos = await self.addon.todos.get(interaction.user.id)
+            user_todos.remove_category(_name, delete_todos=delete_associated)
 
-            await self.addon.bot.db.execute(query, interaction.user.id, _name)
-            for todo in filter(
-                lambda t: t.category == _name,
-                self.addon.todos[interaction.user.id].copy(),
-            ):
-                if delete_associated:
-                    self.addon.todos[interaction.user.id].remove(todo)
-                else:
-                    todo.category = None
-
-            # Remove from a shallow copy first
-            (categories := profile.todo_categories[:]).remove(_name)
-            profile.todo_categories = categories
+            # Deleting the category leaves any todos still in it
+            # uncategorized, via the key on `todos`
+            await profile.remove_todo_category(_name)
 
             await send_confirmation(interaction)
 
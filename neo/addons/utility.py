@@ -89,6 +89,19 @@ class Utility(neo.Addon):
             engine_id=self.bot.cfg["bot"]["cse_engine"],
             session=self.bot.session,
         )
+        self.bot.metrics.counter(
+            "neo_cse_searches_total",
+            "Google searches, by whether they were served from the cache "
+            "(hit), shared an in-flight request (coalesced), or used quota "
+            "(miss)",
+            ("result",),
+        ).set_function(
+            lambda: {
+                ("hit",): self.google.hits,
+                ("coalesced",): self.google.coalesced,
+                ("miss",): self.google.misses,
+            }
+        )
         self.dictionary = dictionary.Define(self.bot.session)
         self.appinfo = await self.bot.application_info()
         buttons = [
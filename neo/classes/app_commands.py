@@ -2,10 +2,12 @@
 # Copyright (C) 2023 sardonicism-04
 from __future__ import annotations
 
+import time
 from typing import TYPE_CHECKING, Any, Optional, ParamSpec, TypeVar, cast
 
 from discord import AppCommandOptionType, Interaction, app_commands
 from discord.ext.commands import Cog
+from discord.utils import async_all
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -105,18 +107,136 @@ class AutoEphemeralAppCommand(app_commands.Command[GroupT, P, T]):
         interaction: Interaction,
         namespace: app_commands.Namespace,
     ) -> T:
+        if TYPE_CHECKING:
+            bot = cast(Neo, interaction.client)
+        else:
+            bot = interaction.client
+
+        start = time.perf_counter()
+        timings: dict[str, float] = {}
+        status = "error"
+        try:
+            with bot.watchdog.label(f"command /{self.qualified_name}"):
+                result = await self._invoke_phases(
+                    interaction, namespace, timings
+                )
+            status = "ok"
+            return result
+        finally:
+            # Whatever the command changed may show up in autocompletes
+            bot.autocomplete.invalidate_user(interaction.user.id)
+            bot.metrics.histogram(
+                "neo_command_latency_seconds",
+                "Time taken to run app commands",
+                ("command", "status"),
+            ).observe(
+                time.perf_counter() - start,
+                command=self.qualified_name,
+                status=status,
+            )
+            if bot.profiler.enabled:
+                # Responses are sent from within the callback, so their
+                # time is moved out of the callback's phase
+                response = interaction.extras.get("response_time", 0.0)
+                timings["response"] = response
+                if "callback" in timings:
+                    timings["callback"] -= response
+                bot.profiler.record(
+                    self.qualified_name, timings, failed=status == "error"
+                )
+
+    async def _invoke_autocomplete(
+        self,
+        interaction: Interaction,
+        name: str,
+        namespace: app_commands.Namespace,
+    ):
+        # Mirrors the upstream implementation, but hands the callback off
+        # to the autocomplete middleware instead of responding directly
+        if TYPE_CHECKING:
+            bot = cast(Neo, interaction.client)
+        else:
+            bot = interaction.client
+
+        value = namespace.__dict__[name]
+
+        param = self._params.get(name)
+        if param is None:
+            # Slow case, it might be a rename
+            params = {p.display_name: p for p in self._params.values()}
+            if (param := params.get(name)) is None:
+                raise app_commands.CommandSignatureMismatch(self)
+
+        if (autocomplete := param.autocomplete) is None:
+            raise app_commands.CommandSignatureMismatch(self)
+
+        predicates = getattr(
+            autocomplete, "__discord_app_commands_checks__", []
+        )
+        if predicates:
+            try:
+                passed = await async_all(f(interaction) for f in predicates)
+            except Exception:
+                passed = False
+
+            if not passed:
+                if not interaction.response.is_done():
+                    await interaction.response.autocomplete([])
+                return
+
+        args: tuple[Any, ...] = (interaction, value)
+        if getattr(autocomplete, "pass_command_binding", False):
+            if self.binding is None:
+                raise TypeError(
+                    "autocomplete parameter expected a bound self parameter "
+                    "but one was not provided"
+                )
+            args = (self.binding, *args)
+
+        async def callback():
+            with bot.watchdog.label(f"autocomplete /{self.qualified_name}"):
+                return await autocomplete(*args)  # type: ignore
+
+        await bot.autocomplete.complete(
+            interaction,
+            command=self.qualified_name,
+            param=param.name,
+            current=value,
+            callback=callback,
+        )
+
+    async def _invoke_phases(
+        self,
+        interaction: Interaction,
+        namespace: app_commands.Namespace,
+        timings: dict[str, float],
+    ) -> T:
+        mark = time.perf_counter()
+
+        def lap(phase: str):
+            nonlocal mark
+            now = time.perf_counter()
+            timings[phase] = now - mark
+            mark = now
+
         if not getattr(self.callback, "no_defer", False):
             await interaction.response.defer()
+            lap("defer")
 
         if not await self._check_can_run(interaction):
             raise app_commands.CheckFailure(
                 f"The check functions for command {self.name!r} failed."
             )
+        lap("checks")
 
         transformed_values = await self._transform_arguments(
             interaction, namespace
         )
         interaction.namespace.ephemeral = get_ephemeral(interaction, namespace)  # type: ignore
+        lap("transform")
 
         transformed_values.pop("private", None)
-        return await self._do_call(interaction, transformed_values)
+        try:
+            return await self._do_call(interaction, transformed_values)
+        finally:
+            lap("callback")
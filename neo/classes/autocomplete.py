@@ -0,0 +1,171 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from typing import TYPE_CHECKING, Any
+
+from discord import utils
+
+from .containers import CacheStats, TimedCache
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from discord import Interaction
+    from discord.app_commands import Choice
+
+    from neo.modules.metrics import MetricsRegistry
+
+    CacheKey = tuple[
+        int, int | None, int, str, str, str, tuple[tuple[str, str], ...]
+    ]
+    RequestKey = tuple[int, str, str]
+
+# Discord discards autocomplete responses sent later than this
+AUTOCOMPLETE_DEADLINE = 3.0
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5)
+
+
+def _namespace_key(
+    interaction: Interaction, param: str
+) -> tuple[tuple[str, str], ...]:
+    """Returns a hashable view of the options filled besides `param`"""
+    return tuple(
+        sorted(
+            (name, str(getattr(value, "id", value)))
+            for name, value in interaction.namespace
+            if name != param
+        )
+    )
+
+
+class AutocompleteMiddleware:
+    """
+    Sits between app commands and their autocomplete callbacks
+
+    - Results are cached per user, guild, command, parameter, input, and
+      the command's other filled options for `ttl` seconds. A user's
+      cached results are dropped whenever they run a command, since
+      commands are what change autocompleted data.
+    - A user only ever sees the response to the latest keystroke, so when
+      a new request comes in for the same parameter, any request still in
+      flight for it is cancelled.
+    - Requests which can no longer make Discord's deadline aren't
+      responded to.
+    """
+
+    __slots__ = (
+        "cache",
+        "stats",
+        "generations",
+        "_next_generation",
+        "inflight",
+        "latency",
+        "deadline_misses",
+    )
+
+    def __init__(self, metrics: MetricsRegistry, *, ttl: int = 5):
+        self.cache: TimedCache[CacheKey, list[Choice[Any]]] = TimedCache(ttl)
+        self.stats = CacheStats()
+        # Bumped to invalidate every cached result for a user at once.
+        # Generations are unique across users, so a user's can be dropped
+        # once every result cached under the one before it has expired
+        self.generations: TimedCache[int, int] = TimedCache(ttl)
+        self._next_generation = itertools.count(1)
+        self.inflight: dict[
+            RequestKey, asyncio.Future[list[Choice[Any]]]
+        ] = {}
+
+        self.latency = metrics.histogram(
+            "neo_autocomplete_latency_seconds",
+            "Time taken to produce autocomplete results",
+            ("command", "result"),
+            buckets=LATENCY_BUCKETS,
+        )
+        self.deadline_misses = metrics.counter(
+            "neo_autocomplete_deadline_misses_total",
+            "Autocomplete requests which missed Discord's deadline",
+            ("command",),
+        )
+
+    def invalidate_user(self, user_id: int):
+        """Drops every cached result for a user"""
+        self.generations[user_id] = next(self._next_generation)
+
+    async def complete(
+        self,
+        interaction: Interaction,
+        *,
+        command: str,
+        param: str,
+        current: Any,
+        callback: Callable[[], Awaitable[list[Choice[Any]]]],
+    ):
+        """Responds to an autocomplete interaction with `callback`'s result"""
+        start = time.perf_counter()
+        user_id = interaction.user.id
+        request_key: RequestKey = (user_id, command, param)
+        generation = self.generations.get(user_id, 0)
+        cache_key: CacheKey = (
+            user_id,
+            interaction.guild_id,
+            generation,
+            command,
+            param,
+            str(current),
+            _namespace_key(interaction, param),
+        )
+
+        if (previous := self.inflight.pop(request_key, None)) is not None:
+            previous.cancel()
+
+        result = "hit"
+        choices = self.cache.get(cache_key)
+        if not self.stats.record(choices is not None):
+            result = "miss"
+            task = self.inflight[request_key] = asyncio.ensure_future(
+                callback()
+            )
+            try:
+                choices = await task
+            except asyncio.CancelledError:
+                current_task = asyncio.current_task()
+                if current_task is not None and current_task.cancelling():
+                    raise
+                # Superseded by a newer request from the same user
+                self.latency.observe(
+                    time.perf_counter() - start,
+                    command=command,
+                    result="superseded",
+                )
+                return
+            except Exception:
+                self.latency.observe(
+                    time.perf_counter() - start,
+                    command=command,
+                    result="error",
+                )
+                raise
+            finally:
+                if self.inflight.get(request_key) is task:
+                    del self.inflight[request_key]
+
+            # Results computed across an invalidation may already be stale
+            if self.generations.get(user_id, 0) == generation:
+                self.cache[cache_key] = choices
+
+        self.latency.observe(
+            time.perf_counter() - start, command=command, result=result
+        )
+
+        age = (utils.utcnow() - interaction.created_at).total_seconds()
+        if age >= AUTOCOMPLETE_DEADLINE:
+            self.deadline_misses.inc(command=command)
+            return
+
+        if not interaction.response.is_done():
+            await interaction.response.autocomplete(choices)
@@ -0,0 +1,234 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Literal, Optional
+from uuid import UUID, uuid4
+
+from asyncpg import connect
+
+from ..tools.formatters import format_exception
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from asyncpg import Connection
+
+    from neo import Neo
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "neo_row_change"
+
+# Key columns which JSON can't carry natively, restored by column name
+COLUMN_DECODERS: dict[str, Callable[[Any], Any]] = {
+    "todo_id": UUID,
+    "reminder_id": UUID,
+}
+
+
+def _decode_key(key: dict[str, Any]) -> dict[str, Any]:
+    return {
+        column: COLUMN_DECODERS[column](value)
+        if column in COLUMN_DECODERS and value is not None
+        else value
+        for column, value in key.items()
+    }
+
+
+class RowChange:
+    """
+    Represents a single row-level change made by another process
+
+    `key` holds the primary key columns of the changed row. For inserts and
+    updates, `row` is the row as re-fetched after the change. For deletes
+    it's just the key, since there's nothing left to fetch. `old_key` is
+    the row's key before an update, which may differ from `key` if the
+    update changed it.
+    """
+
+    __slots__ = (
+        "table",
+        "operation",
+        "key",
+        "old_key",
+        "row",
+        "origin",
+        "sent_at",
+    )
+
+    def __init__(
+        self,
+        *,
+        table: str,
+        operation: Literal["INSERT", "UPDATE", "DELETE"],
+        key: dict[str, Any],
+        old_key: Optional[dict[str, Any]],
+        origin: str,
+        sent_at: float,
+    ):
+        self.table = table
+        self.operation = operation
+        self.origin = origin
+        self.sent_at = sent_at
+        self.key = _decode_key(key)
+        self.old_key = self.key if old_key is None else _decode_key(old_key)
+        self.row: dict[str, Any] = self.key
+
+    def __repr__(self):
+        return (
+            "<{0.__class__.__name__} table={0.table!r} "
+            "operation={0.operation!r}>"
+        ).format(self)
+
+
+class CacheCoherence:
+    """
+    Keeps process-local caches coherent across processes
+
+    Row-level changes are sent by `notify_row_change` triggers, and are
+    received on a dedicated connection outside of the pool. Notifications
+    only carry the changed row's key, so inserted and updated rows are
+    re-fetched. Changes are handled one at a time, in the order they were
+    received, and each is applied to the bot's own caches, then broadcast
+    to addons as a `remote_change` event.
+
+    Changes made by this process are tagged with its `origin` (the
+    connection's application name) and ignored, since they have already
+    been applied locally.
+    """
+
+    __slots__ = (
+        "bot",
+        "origin",
+        "connection",
+        "notifications",
+        "total_lag",
+        "max_lag",
+        "last_lag",
+        "_queue",
+        "_worker",
+        "_closing",
+    )
+
+    def __init__(self, bot: Neo):
+        self.bot = bot
+        self.origin = f"neo-{uuid4().hex[:12]}"
+        self.connection: Optional[Connection] = None
+
+        self.notifications = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._queue: asyncio.Queue[RowChange] = asyncio.Queue()
+        self._worker: Optional[asyncio.Task[None]] = None
+        self._closing = False
+
+    @property
+    def mean_lag(self) -> float:
+        if self.notifications == 0:
+            return 0.0
+        return self.total_lag / self.notifications
+
+    async def start(self):
+        self.connection = await connect(
+            **self.bot.cfg["database"],
+            server_settings={"application_name": f"{self.origin}-listener"},
+        )
+        await self.connection.add_listener(CHANNEL, self._on_notify)
+        self.connection.add_termination_listener(self._on_terminate)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._process_changes())
+
+    async def close(self):
+        self._closing = True
+        if self._worker is not None:
+            self._worker.cancel()
+        if self.connection is not None and not self.connection.is_closed():
+            await self.connection.close()
+
+    def _on_terminate(self, connection: Connection):
+        if self._closing:
+            return
+
+        log.warning(
+            "Cache coherence connection was lost, caches may be stale "
+            "until it is re-established"
+        )
+        asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = 1
+        while not self._closing:
+            try:
+                await self.start()
+            except Exception as e:
+                log.error(format_exception(e))
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+            else:
+                log.info("Cache coherence connection re-established")
+                return
+
+    def _on_notify(
+        self, connection: Connection, pid: int, channel: str, payload: str
+    ):
+        data = json.loads(payload)
+        if data["origin"] == self.origin:
+            return
+
+        change = RowChange(**data)
+
+        lag = max(time.time() - change.sent_at, 0.0)
+        self.notifications += 1
+        self.total_lag += lag
+        self.last_lag = lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+        self._queue.put_nowait(change)
+
+    async def _fetch_row(self, change: RowChange) -> Optional[dict[str, Any]]:
+        conditions = " AND ".join(
+            f"{column} = ${index}"
+            for index, column in enumerate(change.key, start=1)
+        )
+        record = await self.bot.db.fetchrow(
+            f"SELECT * FROM {change.table} WHERE {conditions}",
+            *change.key.values(),
+        )
+        return None if record is None else dict(record)
+
+    async def _process_changes(self):
+        while True:
+            change = await self._queue.get()
+            try:
+                await self._process_change(change)
+            finally:
+                self._queue.task_done()
+
+    async def _process_change(self, change: RowChange):
+        if change.operation != "DELETE":
+            try:
+                row = await self._fetch_row(change)
+            except Exception as e:
+                log.error(format_exception(e))
+                return
+            if row is None:
+                # Deleted since, which a later notification covers
+                return
+            change.row = row
+
+        try:
+            self.bot.apply_remote_change(change)
+        except Exception as e:
+            log.error(format_exception(e))
+        self.bot.broadcast("remote_change", change)
+
+    async def wait_applied(self):
+        """Waits until every change received so far has been applied"""
+        await self._queue.join()
@@ -5,11 +5,13 @@ from __future__ import annotations
 import asyncio
 import zoneinfo
 from abc import ABCMeta, abstractmethod
-from collections.abc import Mapping, MutableMapping, MutableSet
-from functools import cache
+from collections.abc import Iterable, Mapping, MutableMapping, MutableSet
 from typing import TYPE_CHECKING, Any, Generic, Optional, TypeVar
 
 from neo.tools import humanize_snake_case
+from neo.tools.timezones import get_timezone
+
+from .shutdown import create_tracked_task
 
 if TYPE_CHECKING:
     import datetime
@@ -49,7 +51,7 @@ class RecordContainer(metaclass=ABCMeta):
     Provides an OOP interface for getting data from and updating a database record
     """
 
-    __slots__ = ("ready", "pool", "hooks")
+    __slots__ = ("ready", "pool", "hooks", "derived")
 
     def __init__(self, *, pool, **record):
         super().__setattr__("ready", False)
@@ -63,6 +65,8 @@ class RecordContainer(metaclass=ABCMeta):
     def __new__(cls, *args, **kwargs):
         instance = super().__new__(cls)
         object.__setattr__(instance, "hooks", {})
+        # Values computed from record attributes, cleared on every change
+        object.__setattr__(instance, "derived", {})
 
         for name in dir(instance):
             attr = getattr(instance, name, None)
@@ -84,9 +88,26 @@ class RecordContainer(metaclass=ABCMeta):
             )
 
         if getattr(self, "ready", False):
-            asyncio.create_task(self.update_relation(attribute, value))
+            create_tracked_task(self.update_relation(attribute, value))
 
         super().__setattr__(attribute, value)
+        self.derived.clear()
+
+    def apply_record(self, record: Mapping[str, Any]):
+        """
+        Updates attributes from a record without writing them back to the
+        database, for changes that have already been persisted elsewhere
+        """
+        for key, value in record.items():
+            if key in self.__slots__:
+                object.__setattr__(self, key, value)
+        self.derived.clear()
+
+    def to_record(self) -> dict[str, Any]:
+        """Returns the raw, unhooked values of all record attributes"""
+        return {
+            attr: object.__getattribute__(self, attr) for attr in self.__slots__
+        }
 
     def __getattribute__(self, attribute):
         value = object.__getattribute__(self, attribute)
@@ -129,19 +150,34 @@ class NeoUser(RecordContainer):
         "silence_hl",
     )
 
+    def __init__(self, *, pool, todo_categories: Iterable[str] = (), **record):
+        # Categories are stored in their own table, so they're not part of
+        # most profile records, and are loaded separately
+        super().__init__(
+            pool=pool, todo_categories=[*todo_categories], **record
+        )
+
     def __repr__(self):
         return "<{0.__class__.__name__} user_id={0.user_id}>".format(self)
 
+    def to_record(self) -> dict[str, Any]:
+        record = super().to_record()
+        # Not part of the profiles table, see `__init__`
+        del record["todo_categories"]
+        return record
+
     @add_hook("timezone")
-    @cache
     def cast_timezone(
         self, timezone: str | None = None
     ) -> zoneinfo.ZoneInfo | None:
         if timezone is not None:
-            return zoneinfo.ZoneInfo(timezone)
+            return get_timezone(timezone)
         return None
 
     async def update_relation(self, attribute, value):
+        if attribute == "todo_categories":
+            return await self.sync_todo_categories(value)
+
         await self.pool.execute(
             f"""
             UPDATE profiles
@@ -154,6 +190,74 @@ class NeoUser(RecordContainer):
             self.user_id,
         )
 
+    async def sync_todo_categories(self, categories: list[str]):
+        """Writes this user's todo categories to the `todo_categories` table"""
+        async with self.pool.acquire() as conn, conn.transaction():
+            await conn.execute(
+                """
+                DELETE FROM
+                    todo_categories
+                WHERE
+                    user_id=$1 AND
+                    NOT name=ANY($2::VARCHAR(100)[])
+                """,
+                self.user_id,
+                categories,
+            )
+            await conn.execute(
+                """
+                INSERT INTO todo_categories (
+                    user_id,
+                    name
+                )
+                SELECT $1, name FROM unnest($2::VARCHAR(100)[]) AS name
+                ON CONFLICT DO NOTHING
+                """,
+                self.user_id,
+                categories,
+            )
+
+    async def add_todo_category(self, name: str):
+        """Adds a single todo category, awaiting the write"""
+        await self.pool.execute(
+            """
+            INSERT INTO todo_categories (
+                user_id,
+                name
+            ) VALUES ($1, $2)
+            ON CONFLICT DO NOTHING
+            """,
+            self.user_id,
+            name,
+        )
+        if name not in self.todo_categories:
+            self.apply_record(
+                {"todo_categories": [*self.todo_categories, name]}
+            )
+
+    async def remove_todo_category(self, name: str):
+        """Removes a single todo category, awaiting the write"""
+        await self.pool.execute(
+            """
+            DELETE FROM
+                todo_categories
+            WHERE
+                user_id=$1 AND
+                name=$2
+            """,
+            self.user_id,
+            name,
+        )
+        self.apply_record(
+            {
+                "todo_categories": [
+                    category
+                    for category in self.todo_categories
+                    if category != name
+                ]
+            }
+        )
+
     async def reset_attribute(self, attribute):
         if attribute not in self.__slots__:
             raise AttributeError(
@@ -194,6 +298,13 @@ class NeoGuildConfig(RecordContainer):
     def __repr__(self):
         return "<{0.__class__.__name__} guild_id={0.guild_id}>".format(self)
 
+    @property
+    def gate(self) -> GuildGate:
+        """The interaction gate for this guild, rebuilt after any change"""
+        if (gate := self.derived.get("gate")) is None:
+            gate = self.derived["gate"] = GuildGate(self)
+        return gate
+
     async def update_relation(self, attribute, value):
         await self.pool.execute(
             f"""
@@ -230,6 +341,27 @@ class NeoGuildConfig(RecordContainer):
         super().__setattr__(attribute, value)
 
 
+class GuildGate:
+    """Precomputed lookups for checking interactions in a guild"""
+
+    __slots__ = ("disabled_channels", "disabled_commands")
+
+    def __init__(self, config: NeoGuildConfig):
+        self.disabled_channels = frozenset(config.disabled_channels)
+        self.disabled_commands = frozenset(config.disabled_commands)
+
+    def __bool__(self):
+        # An empty gate lets every interaction through
+        return bool(self.disabled_channels or self.disabled_commands)
+
+    def is_command_disabled(self, qualified_name: str) -> bool:
+        # Disabling a group disables all of its subcommands
+        return (
+            qualified_name in self.disabled_commands
+            or qualified_name.partition(" ")[0] in self.disabled_commands
+        )
+
+
 T = TypeVar("T")
 
 
@@ -288,6 +420,8 @@ class TimedSet(MutableSet, Generic[T]):
 KT = TypeVar("KT")
 VT = TypeVar("VT")
 
+_MISSING: Any = object()
+
 
 class TimedCache(MutableMapping, Generic[KT, VT]):
     __slots__ = ("__underlying_dict", "__running_store", "loop", "timeout")
@@ -335,6 +469,42 @@ class TimedCache(MutableMapping, Generic[KT, VT]):
         return len(self.__underlying_dict)
 
 
+class CacheStats:
+    """Counts how many lookups against a cache were hits and misses"""
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> bool:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return hit
+
+
+class CountedDict(dict[KT, VT]):
+    """A dict which counts `in` and `get` lookups in its `stats`"""
+
+    __slots__ = ("stats",)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = CacheStats()
+
+    def __contains__(self, key: object) -> bool:
+        return self.stats.record(super().__contains__(key))
+
+    def get(self, key: KT, default: Any = None) -> Any:
+        value = super().get(key, _MISSING)
+        if self.stats.record(value is not _MISSING):
+            return value
+        return default
+
+
 class Setting(MutableMapping):
     __slots__ = ("__setting_key", "__setting_data")
 
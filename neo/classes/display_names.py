@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Literal, Optional
+
+import discord
+
+from .containers import TimedCache
+from .partials import PartialUser
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from neo import Neo
+
+log = logging.getLogger(__name__)
+
+NameKind = Literal["guild", "channel", "user", "unknown"]
+
+
+class DisplayName:
+    """What an ID was resolved to, and the name to display for it"""
+
+    __slots__ = ("id", "kind", "name")
+
+    def __init__(self, id: int, kind: NameKind, name: Optional[str] = None):
+        self.id = id
+        self.kind = kind
+        self.name = name
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} id={0.id} kind={0.kind!r}>".format(
+            self
+        )
+
+
+class DisplayNameCache:
+    """
+    Resolves IDs of guilds, channels, and users to display names
+
+    Resolved names are kept for `ttl` seconds, and dropped early when the
+    underlying guild, channel, or user is updated. IDs which can't be
+    resolved from the local caches are assumed to be users, and can be
+    fetched over REST in batches with `resolve`; at most `concurrency`
+    requests run at once. IDs which turn out not to exist are remembered
+    as unknown for the TTL, so that they aren't fetched again.
+    """
+
+    __slots__ = ("bot", "names", "pending", "semaphore")
+
+    def __init__(self, bot: Neo, *, ttl: int = 300, concurrency: int = 5):
+        self.bot = bot
+        self.names: TimedCache[int, DisplayName] = TimedCache(ttl)
+        self.pending: dict[int, asyncio.Future[DisplayName]] = {}
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def _lookup(self, id: int) -> Optional[DisplayName]:
+        if (guild := self.bot.get_guild(id)) is not None:
+            return DisplayName(id, "guild", guild.name)
+        if (channel := self.bot.get_channel(id)) is not None:
+            return DisplayName(id, "channel", getattr(channel, "name", None))
+        if not isinstance(user := self.bot.get_user(id), PartialUser):
+            return DisplayName(id, "user", user.name)
+        return None
+
+    def get(self, id: int) -> DisplayName:
+        """
+        Resolves an ID without making any requests
+
+        IDs which aren't known locally are returned as unknown, but aren't
+        cached as such.
+        """
+        if (cached := self.names.get(id)) is not None:
+            return cached
+        if (found := self._lookup(id)) is not None:
+            self.names[id] = found
+            return found
+        return DisplayName(id, "unknown")
+
+    async def resolve(self, ids: Iterable[int]) -> dict[int, DisplayName]:
+        """Resolves IDs, fetching any unknown IDs as users"""
+        resolved: dict[int, DisplayName] = {}
+        to_fetch: dict[int, asyncio.Future[DisplayName]] = {}
+
+        for id in ids:
+            name = self.get(id)
+            if name.kind != "unknown" or id in self.names:
+                resolved[id] = name
+                continue
+
+            # Concurrent resolutions of the same ID share one request
+            if (future := self.pending.get(id)) is None:
+                future = self.pending[id] = asyncio.ensure_future(
+                    self._fetch_user(id)
+                )
+            to_fetch[id] = future
+
+        if to_fetch:
+            results = await asyncio.gather(*to_fetch.values())
+            resolved.update(zip(to_fetch.keys(), results))
+
+        return resolved
+
+    async def _fetch_user(self, id: int) -> DisplayName:
+        try:
+            async with self.semaphore:
+                user = await self.bot.fetch_user(id)
+            name = DisplayName(id, "user", user.name)
+        except discord.NotFound:
+            name = DisplayName(id, "unknown")
+        except discord.HTTPException as e:
+            # Left uncached, so that the fetch is retried next time
+            log.warning(f"Failed to fetch user {id}: {e}")
+            return DisplayName(id, "unknown")
+        finally:
+            self.pending.pop(id, None)
+
+        self.names[id] = name
+        return name
+
+    def invalidate(self, id: int):
+        self.names.pop(id, None)
@@ -0,0 +1,247 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Optional
+
+from ..tools.formatters import format_exception
+from .shutdown import create_tracked_task
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from neo import Neo
+    from neo.modules.addon.addon import Addon, Receiver
+
+log = logging.getLogger(__name__)
+
+EventPayload = tuple[tuple[Any, ...], dict[str, Any]]
+
+
+class EventStats:
+    """Dispatch and handler statistics for a single event type"""
+
+    __slots__ = (
+        "dispatches",
+        "handled",
+        "errors",
+        "dropped",
+        "total_latency",
+        "max_latency",
+    )
+
+    def __init__(self):
+        self.dispatches = 0
+        self.handled = 0
+        self.errors = 0
+        self.dropped = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def __repr__(self):
+        return (
+            "<{0.__class__.__name__} dispatches={0.dispatches} "
+            "errors={0.errors} dropped={0.dropped}>"
+        ).format(self)
+
+    @property
+    def mean_latency(self) -> float:
+        if self.handled == 0:
+            return 0.0
+        return self.total_latency / self.handled
+
+    def record(self, elapsed: float, *, failed: bool = False):
+        self.handled += 1
+        self.total_latency += elapsed
+        if elapsed > self.max_latency:
+            self.max_latency = elapsed
+        if failed:
+            self.errors += 1
+
+
+class BoundReceiver:
+    """A receiver bound to the addon instance that owns it"""
+
+    __slots__ = ("addon", "func", "is_coro", "name")
+
+    def __init__(self, addon: Addon, func: Receiver):
+        self.addon = addon
+        self.func = func
+        self.is_coro = inspect.iscoroutinefunction(func)
+        self.name = f"{addon.qualified_name}.{func.__name__}"
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} name={0.name!r}>".format(self)
+
+
+class EventBus:
+    """
+    Routes broadcast events to addon receivers
+
+    The event → receivers table is precomputed, and must be rebuilt with
+    `rebuild` whenever addons are loaded or unloaded. Receivers are called
+    in addon load order, and errors are captured per receiver so that one
+    failing receiver can't affect the others.
+
+    Events may optionally be given a bounded queue with `set_queue` (see
+    the `[events]` config section), in which case dispatches are processed
+    one at a time in the order they were broadcast, and are dropped once
+    the queue is full.
+    """
+
+    __slots__ = ("bot", "receivers", "queues", "workers", "stats", "latency")
+
+    def __init__(self, bot: Neo):
+        self.bot = bot
+        self.receivers: dict[str, tuple[BoundReceiver, ...]] = {}
+        self.queues: dict[str, asyncio.Queue[Optional[EventPayload]]] = {}
+        self.workers: dict[str, asyncio.Task[None]] = {}
+        self.stats: defaultdict[str, EventStats] = defaultdict(EventStats)
+        self.latency = bot.metrics.histogram(
+            "neo_event_handler_seconds",
+            "Time taken by event receivers",
+            ("event",),
+        )
+
+    def rebuild(self):
+        """Recompute the event → receivers table from the loaded addons"""
+        table: defaultdict[str, list[BoundReceiver]] = defaultdict(list)
+        for addon in self.bot.cogs.values():
+            for event, receiver in addon.__receivers__.items():
+                table[event].append(BoundReceiver(addon, receiver))
+
+        self.receivers = {event: (*bound,) for event, bound in table.items()}
+
+    def set_queue(self, event: str, maxsize: int):
+        """
+        Process dispatches of `event` through a queue holding at most
+        `maxsize` pending dispatches
+
+        If the event already has a queue, its pending dispatches are moved
+        to the new one, and its worker stops once it's done with the
+        dispatch it's processing.
+        """
+        queue: asyncio.Queue[Optional[EventPayload]] = asyncio.Queue(maxsize)
+
+        if (old_queue := self.queues.get(event)) is not None:
+            while not old_queue.empty():
+                payload = old_queue.get_nowait()
+                old_queue.task_done()
+                try:
+                    queue.put_nowait(payload)
+                except asyncio.QueueFull:
+                    self.stats[event].dropped += 1
+                    log.warning(
+                        f"Dropped dispatch of {event!r} while resizing its queue"
+                    )
+            # Wakes the old worker if it's idle, so that it can exit
+            old_queue.put_nowait(None)
+
+        self.queues[event] = queue
+        self.workers[event] = asyncio.create_task(
+            self._queue_worker(event, queue)
+        )
+
+    async def flush(self):
+        """Waits for every queued dispatch to be processed"""
+        await asyncio.gather(*(queue.join() for queue in self.queues.values()))
+
+    def dispatch(self, event: str, *args, **kwargs):
+        stats = self.stats[event]
+        stats.dispatches += 1
+
+        # Fast path, nothing to do if nobody is listening
+        if not (receivers := self.receivers.get(event)):
+            return
+
+        if event in self.queues:
+            try:
+                self.queues[event].put_nowait((args, kwargs))
+            except asyncio.QueueFull:
+                stats.dropped += 1
+                log.warning(f"Dropped dispatch of {event!r}, queue is full")
+            return
+
+        coros: list[Awaitable[None]] = []
+        for receiver in receivers:
+            if receiver.is_coro:
+                coros.append(self._run_receiver(event, receiver, args, kwargs))
+            else:
+                self._call_receiver(event, receiver, args, kwargs)
+
+        if coros:
+            create_tracked_task(self._gather(coros))
+
+    def _call_receiver(
+        self,
+        event: str,
+        receiver: BoundReceiver,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ):
+        start = time.perf_counter()
+        failed = False
+        try:
+            with self.bot.watchdog.label(f"receiver {receiver.name}"):
+                receiver.func(receiver.addon, *args, **kwargs)
+        except Exception as e:
+            failed = True
+            log.error(
+                f"In receiver {receiver.name} for {event!r}\n"
+                + format_exception(e)
+            )
+        finally:
+            self._record(event, time.perf_counter() - start, failed=failed)
+
+    async def _run_receiver(
+        self,
+        event: str,
+        receiver: BoundReceiver,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ):
+        start = time.perf_counter()
+        failed = False
+        try:
+            with self.bot.watchdog.label(f"receiver {receiver.name}"):
+                await receiver.func(receiver.addon, *args, **kwargs)
+        except Exception as e:
+            failed = True
+            log.error(
+                f"In receiver {receiver.name} for {event!r}\n"
+                + format_exception(e)
+            )
+        finally:
+            self._record(event, time.perf_counter() - start, failed=failed)
+
+    def _record(self, event: str, elapsed: float, *, failed: bool):
+        self.stats[event].record(elapsed, failed=failed)
+        self.latency.observe(elapsed, event=event)
+
+    @staticmethod
+    async def _gather(coros: list[Awaitable[None]]):
+        await asyncio.gather(*coros)
+
+    async def _queue_worker(
+        self, event: str, queue: asyncio.Queue[Optional[EventPayload]]
+    ):
+        while True:
+            if (payload := await queue.get()) is None:
+                # The queue was replaced by `set_queue`
+                queue.task_done()
+                return
+
+            args, kwargs = payload
+            try:
+                for receiver in self.receivers.get(event, ()):
+                    if receiver.is_coro:
+                        await self._run_receiver(event, receiver, args, kwargs)
+                    else:
+                        self._call_receiver(event, receiver, args, kwargs)
+            finally:
+                queue.task_done()
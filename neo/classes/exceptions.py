@@ -19,3 +19,10 @@ class DisabledChannel(NeoException):
 
     def __str__(self):
         return "Commands are disabled in this channel."
+
+
+class ShuttingDown(NeoException):
+    """Raised when an interaction is received while the bot is shutting down"""
+
+    def __str__(self):
+        return "The bot is restarting, please try again shortly."
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import re
-from operator import attrgetter
+from collections import Counter
+from copy import deepcopy
 from typing import TYPE_CHECKING, Any, Optional
 
 import discord
@@ -18,6 +19,8 @@ from neo.types.commands import AnyCommand
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
+    from discord.types.embed import Embed as EmbedData
+
     from neo import Addon, Neo
 
     HelpMapping = dict[Optional[Addon], list[AnyCommand]]
@@ -116,6 +119,84 @@ def generate_param_help(command: app_commands.Command) -> str:
 
 leading_whitespace = re.compile(r"(?!$)^\s+", re.MULTILINE)
 
+# Matches scoring below this are left out of autocomplete results
+MIN_MATCH_SCORE = 0.2
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class HelpIndex:
+    """
+    Pre-rendered help for every command, along with a fuzzy search over
+    command names
+
+    Embeds are stored as dicts, and a fresh embed is made from them each
+    time one is needed, since menus modify the embeds that they display.
+    """
+
+    __slots__ = ("bot_help", "command_help", "names", "grams", "postings")
+
+    def __init__(
+        self, bot_help: list[EmbedData], command_help: dict[str, EmbedData]
+    ):
+        self.bot_help = bot_help
+        self.command_help = command_help
+        self.names = [*command_help]
+
+        self.grams: list[set[str]] = []
+        self.postings: dict[str, list[int]] = {}
+        for index, name in enumerate(self.names):
+            grams = _trigrams(name.casefold())
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(index)
+
+    def search(self, current: str, *, limit: int = 25) -> list[str]:
+        """
+        Returns the names of the commands which best match `current`
+
+        Names containing `current` rank first (prefixes before other
+        substrings), followed by names sharing enough trigrams with it.
+        """
+        query = current.casefold().strip()
+        if not query:
+            return self.names[:limit]
+
+        query_grams = _trigrams(query)
+        shared = Counter[int]()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+
+        scored: list[tuple[float, str]] = []
+        for index, name in enumerate(self.names):
+            folded = name.casefold()
+            if folded.startswith(query):
+                score = 3.0
+            elif query in folded:
+                score = 2.0
+            elif count := shared.get(index):
+                # Jaccard similarity of the two sets of trigrams
+                score = count / (
+                    len(query_grams) + len(self.grams[index]) - count
+                )
+                if score < MIN_MATCH_SCORE:
+                    continue
+            else:
+                continue
+            scored.append((score, name))
+
+        # Ties are broken in favour of shorter names
+        scored.sort(key=lambda pair: (-pair[0], len(pair[1])))
+        return [name for _, name in scored[:limit]]
+
+
+def embed_from_data(data: EmbedData) -> neo.Embed:
+    # Copied so that changes to the embed don't leak into the index
+    return neo.Embed.from_dict(deepcopy(data))  # type: ignore
+
 
 class AppHelpCommand(AutoEphemeralAppCommand):
     """Displays help for the bot.
@@ -156,13 +237,39 @@ class AppHelpCommand(AutoEphemeralAppCommand):
         )
         self.binding = self
         self.autocomplete("command")(self._autocomplete_impl)
+        self._index: Optional[HelpIndex] = None
+
+    @property
+    def index(self) -> HelpIndex:
+        if self._index is None:
+            return self.build_index()
+        return self._index
+
+    def invalidate(self):
+        """Drops the help index, so that it's rebuilt when next needed"""
+        self._index = None
+
+    def build_index(self) -> HelpIndex:
+        self._index = HelpIndex(
+            [*self.render_bot_help(self.get_mapping())],
+            {
+                command.qualified_name: self.render_command_help(command)
+                for command in self.bot.tree.walk_commands()
+            },
+        )
+        return self._index
 
     @app_commands.describe(command="The command to get help for")
     async def _callback_impl(
         self, interaction: discord.Interaction, command: Optional[str] = None
     ):
         if command is None:
-            return await self.send_bot_help(interaction, self.get_mapping())
+            return await self.send_bot_help(interaction)
+
+        if (rendered := self.index.command_help.get(command)) is not None:
+            return await interaction.response.send_message(
+                embed=embed_from_data(rendered)
+            )
 
         cmd = recursive_get_command(self.bot.tree, command)
         if not cmd:
@@ -173,14 +280,10 @@ class AppHelpCommand(AutoEphemeralAppCommand):
     async def _autocomplete_impl(
         self, interaction: discord.Interaction, current: str
     ):
-        all_commands = map(
-            attrgetter("qualified_name"), self.bot.tree.walk_commands()
-        )
         return [
-            app_commands.Choice(name=k, value=k)
-            for k in all_commands
-            if current in k
-        ][:25]
+            app_commands.Choice(name=name, value=name)
+            for name in self.index.search(current)
+        ]
 
     def get_mapping(self) -> HelpMapping:
         mapping: HelpMapping = {
@@ -208,11 +311,7 @@ class AppHelpCommand(AutoEphemeralAppCommand):
             )
         )
 
-    async def send_bot_help(
-        self, interaction: discord.Interaction, mapping: HelpMapping
-    ):
-        embeds = []
-
+    def render_bot_help(self, mapping: HelpMapping) -> Iterable[EmbedData]:
         for cog, commands in mapping.items():
             # Everything is handled by `filter_commands` here, so
             # app commands will behave as normal
@@ -220,21 +319,20 @@ class AppHelpCommand(AutoEphemeralAppCommand):
                 continue
 
             cog_name = getattr(cog, "qualified_name", "Uncategorized")
-            embeds.append(
-                neo.Embed(
-                    title=cog_name, description=getattr(cog, "description", "")
-                )
-                .add_field(
-                    name="Commands",
-                    value="\n".join(map(format_command, cog_commands)),
-                    inline=False,
-                )
-                .add_field(
-                    name="Lost?",
-                    value="Try /help `command: help` to learn more about neo phoenix",
-                    inline=False,
-                )
-            )
+            yield neo.Embed(
+                title=cog_name, description=getattr(cog, "description", "")
+            ).add_field(
+                name="Commands",
+                value="\n".join(map(format_command, cog_commands)),
+                inline=False,
+            ).add_field(
+                name="Lost?",
+                value="Try /help `command: help` to learn more about neo phoenix",
+                inline=False,
+            ).to_dict()
+
+    async def send_bot_help(self, interaction: discord.Interaction):
+        embeds = [*map(embed_from_data, self.index.bot_help)]
 
         pages = EmbedPages(embeds)
         menu = DropdownMenu.from_pages(
@@ -245,6 +343,10 @@ class AppHelpCommand(AutoEphemeralAppCommand):
     async def send_command_help(
         self, interaction: discord.Interaction, command: AnyCommand
     ):
+        embed = embed_from_data(self.render_command_help(command))
+        await interaction.response.send_message(embed=embed)
+
+    def render_command_help(self, command: AnyCommand) -> EmbedData:
         description = leading_whitespace.sub(
             "",
             max(
@@ -299,4 +401,4 @@ class AppHelpCommand(AutoEphemeralAppCommand):
                 )
             )
 
-        await interaction.response.send_message(embed=embed)
+        return embed.to_dict()
@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # Copyright (C) 2023 sardonicism-04
+import time
 from typing import Optional
 
 import discord
@@ -19,7 +20,18 @@ class AutoEphemeralInteractionResponse(discord.InteractionResponse):
         return await super().defer(ephemeral=_ephemeral, thinking=thinking)
 
     async def send_message(self, *args, **kwargs) -> None:
+        start = time.perf_counter()
+        try:
+            return await self._send_message(*args, **kwargs)
+        finally:
+            # Tracked so that command profiling can separate response time
+            # from the rest of the callback
+            extras = self._parent.extras
+            extras["response_time"] = extras.get("response_time", 0.0) + (
+                time.perf_counter() - start
+            )
 
+    async def _send_message(self, *args, **kwargs) -> None:
         if self._parent.type == discord.InteractionType.application_command:
             is_ephemeral = kwargs.pop("ephemeral", None) or getattr(
                 self._parent.namespace, "private", True
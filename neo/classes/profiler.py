@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import math
+from collections import defaultdict, deque
+
+PHASES = ("defer", "checks", "transform", "callback", "response")
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    index = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class CommandProfile:
+    """Phase timings for a single command"""
+
+    __slots__ = ("calls", "errors", "samples")
+
+    def __init__(self, max_samples: int):
+        self.calls = 0
+        self.errors = 0
+        self.samples: dict[str, deque[float]] = {
+            phase: deque(maxlen=max_samples) for phase in PHASES
+        }
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} calls={0.calls} errors={0.errors}>".format(
+            self
+        )
+
+    def percentiles(self, phase: str) -> tuple[float, float, float]:
+        """Returns the p50, p95, and p99 of a phase, in seconds"""
+        ordered = sorted(self.samples[phase])
+        return (
+            percentile(ordered, 50),
+            percentile(ordered, 95),
+            percentile(ordered, 99),
+        )
+
+
+class CommandProfiler:
+    """
+    Records how long each phase of app command invocation takes
+
+    Phases are:
+    - defer: the automatic defer round-trip
+    - checks: addon and command checks
+    - transform: argument transformation
+    - callback: the command callback, not counting time spent responding
+    - response: sending responses from within the callback
+
+    Only the most recent `max_samples` invocations are kept per command,
+    so that percentiles reflect recent behaviour. Profiling is off until
+    explicitly enabled.
+    """
+
+    __slots__ = ("enabled", "max_samples", "profiles")
+
+    def __init__(self, *, max_samples: int = 1000):
+        self.enabled = False
+        self.max_samples = max_samples
+        self.profiles: defaultdict[str, CommandProfile] = defaultdict(
+            lambda: CommandProfile(self.max_samples)
+        )
+
+    def record(
+        self, command: str, timings: dict[str, float], *, failed: bool = False
+    ):
+        profile = self.profiles[command]
+        profile.calls += 1
+        if failed:
+            profile.errors += 1
+        for phase, elapsed in timings.items():
+            profile.samples[phase].append(elapsed)
+
+    def reset(self):
+        self.profiles.clear()
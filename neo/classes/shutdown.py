@@ -0,0 +1,128 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+from ..tools.formatters import format_exception
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Coroutine
+
+log = logging.getLogger(__name__)
+
+# Strong references to in-flight background tasks, which also keeps them
+# from being garbage collected before they finish
+_background_tasks: set[asyncio.Task[Any]] = set()
+
+
+def create_tracked_task(
+    coro: Coroutine[Any, Any, Any], *, name: Optional[str] = None
+) -> asyncio.Task[Any]:
+    """
+    Creates a fire-and-forget task that shutdown waits for before closing
+    the resources it may depend on
+    """
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+class ShutdownReport:
+    """Describes what was and wasn't completed while draining"""
+
+    __slots__ = ("elapsed", "flushed", "failed", "completed", "dropped")
+
+    def __init__(self):
+        self.elapsed = 0.0
+        self.flushed: list[str] = []
+        self.failed: list[str] = []
+        self.completed = 0
+        self.dropped: list[str] = []
+
+    def __repr__(self):
+        return (
+            "<{0.__class__.__name__} completed={0.completed} "
+            "dropped={1}>"
+        ).format(self, len(self.dropped))
+
+
+class ShutdownCoordinator:
+    """
+    Drains in-flight work before the bot closes its resources
+
+    Draining happens in three steps:
+    1. Intake is stopped, so no new work is accepted
+    2. Registered flushers are run, to push out queued work such as
+       pending deliveries
+    3. Tracked background tasks, such as pending database writes, are
+       waited for
+
+    All of this shares a single deadline, after which anything left is
+    cancelled and reported as dropped.
+    """
+
+    __slots__ = ("deadline", "closing", "flushers")
+
+    def __init__(self, *, deadline: float = 10.0):
+        self.deadline = deadline
+        self.closing = False
+        self.flushers: dict[str, Callable[[], Awaitable[Any]]] = {}
+
+    def register_flusher(self, name: str, flusher: Callable[[], Awaitable[Any]]):
+        self.flushers[name] = flusher
+
+    def unregister_flusher(self, name: str):
+        self.flushers.pop(name, None)
+
+    async def drain(self) -> ShutdownReport:
+        self.closing = True
+        report = ShutdownReport()
+        start = time.perf_counter()
+
+        def remaining() -> float:
+            return max(self.deadline - (time.perf_counter() - start), 0.0)
+
+        flushes = {
+            asyncio.create_task(flusher(), name=name): name
+            for name, flusher in self.flushers.items()
+        }
+        if flushes:
+            done, pending = await asyncio.wait(flushes, timeout=remaining())
+            for task in done:
+                if task.exception() is not None:
+                    report.failed.append(flushes[task])
+                    log.error(
+                        f"In shutdown flusher {flushes[task]!r}\n"
+                        + format_exception(task.exception())  # type: ignore
+                    )
+                else:
+                    report.flushed.append(flushes[task])
+            for task in pending:
+                task.cancel()
+                report.dropped.append(f"flusher {flushes[task]!r}")
+
+        # Flushing may have scheduled more background work, so the set is
+        # only snapshotted once flushers have finished
+        if tasks := {*_background_tasks}:
+            done, pending = await asyncio.wait(tasks, timeout=remaining())
+            report.completed = len(done)
+            for task in pending:
+                task.cancel()
+                report.dropped.append(f"task {task.get_name()!r}")
+
+        report.elapsed = time.perf_counter() - start
+        log.info(
+            f"Drained in {report.elapsed:.2f}s: {len(report.flushed)} "
+            f"flusher(s) run, {report.completed} background task(s) completed"
+        )
+        if report.dropped:
+            log.warning(
+                f"Dropped {len(report.dropped)} item(s) during shutdown: "
+                + ", ".join(report.dropped)
+            )
+        return report
@@ -0,0 +1,262 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import pickle
+import time
+import zlib
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Optional
+
+from ..tools.formatters import format_exception
+from .timer import PeriodicTimer
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from neo import Neo
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"NEOSNAP"
+SNAPSHOT_VERSION = 2
+
+# How long deletions are remembered in `row_deletions`. Older snapshots
+# can't be reconciled, so they're discarded
+DELETION_RETENTION = timedelta(days=7)
+
+# The columns which uniquely identify a row in each snapshotted table. The
+# `record_row_deletion` triggers in sql/triggers.sql must use the same keys
+TABLE_KEYS: dict[str, tuple[str, ...]] = {
+    "profiles": ("user_id",),
+    "guild_configs": ("guild_id",),
+    "highlights": ("user_id", "content"),
+    "reminders": ("reminder_id",),
+    "starboards": ("guild_id",),
+}
+GUILD_TABLES = frozenset({"guild_configs", "starboards"})
+
+SnapshotTable = tuple[tuple[str, ...], list[tuple[Any, ...]]]
+
+
+def _encode(
+    watermark: int,
+    written_at: float,
+    shards: tuple[int, ...],
+    tables: dict[str, SnapshotTable],
+) -> bytes:
+    payload = pickle.dumps(
+        {
+            "watermark": watermark,
+            "written_at": written_at,
+            "shards": shards,
+            "tables": tables,
+        },
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    return (
+        SNAPSHOT_MAGIC
+        + SNAPSHOT_VERSION.to_bytes(2, "big")
+        + zlib.compress(payload)
+    )
+
+
+def _decode(data: bytes) -> Optional[dict[str, Any]]:
+    header_len = len(SNAPSHOT_MAGIC) + 2
+    if not data.startswith(SNAPSHOT_MAGIC):
+        return None
+    if int.from_bytes(data[len(SNAPSHOT_MAGIC) : header_len], "big") != (
+        SNAPSHOT_VERSION
+    ):
+        return None
+    return pickle.loads(zlib.decompress(data[header_len:]))
+
+
+def _write_file(path: str, data: bytes):
+    # Write to a temporary file first so a crash mid-write can't leave
+    # behind a truncated snapshot
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+class StateSnapshot:
+    """
+    Persists in-memory state to a local file for warm starts
+
+    On startup, the snapshot is loaded and then reconciled against the
+    database. Only rows changed since the snapshot was taken are read, and
+    deletions are read from the indexed `row_deletions` table, so no table
+    has to be read in full.
+
+    The watermark is the oldest transaction ID that was still running when
+    the snapshot was taken, so any row with an `xmin` at or past it, and
+    any deletion recorded at or past it, may be missing from the snapshot.
+    If the transaction ID epoch has advanced since then, the comparison is
+    no longer meaningful, and the snapshot is discarded. Snapshots older
+    than `DELETION_RETENTION` are discarded too.
+
+    Staleness window: the snapshot holds this process's caches, which
+    learn of other processes' writes through change notifications. A write
+    which committed before the watermark, but whose notification hadn't
+    been applied when the snapshot was taken, isn't reconciled. Received
+    notifications are applied before the snapshot is taken, so this is
+    limited to ones still in transit, normally a few milliseconds' worth.
+    """
+
+    __slots__ = ("bot", "path", "providers", "tables", "timer")
+
+    def __init__(self, bot: Neo, *, path: str, interval: int):
+        self.bot = bot
+        self.path = path
+        self.providers: dict[str, Callable[[], Iterable[dict[str, Any]]]] = {}
+        self.tables: dict[str, list[dict[str, Any]]] = {}
+        self.timer = PeriodicTimer(self.write, interval)
+
+    def register(
+        self, table: str, provider: Callable[[], Iterable[dict[str, Any]]]
+    ):
+        """Registers a callable which provides the current rows of `table`"""
+        self.providers[table] = provider
+
+    def take(self, table: str) -> Optional[list[dict[str, Any]]]:
+        """
+        Returns the reconciled rows of `table`, or None if the table
+        wasn't restored from the snapshot
+        """
+        return self.tables.pop(table, None)
+
+    async def load(self) -> bool:
+        try:
+            data = await asyncio.to_thread(_read_file, self.path)
+            snapshot = _decode(data) if data is not None else None
+        except Exception as e:
+            log.error(format_exception(e))
+            return False
+
+        if snapshot is None:
+            return False
+
+        # Guild-scoped tables only hold the guilds of the shards that were
+        # running at the time, so a different shard layout can't be reused
+        if snapshot["shards"] != self._shard_layout():
+            log.info("Discarding warm-start snapshot, shard layout changed")
+            return False
+
+        age = time.time() - snapshot["written_at"]
+        if age > DELETION_RETENTION.total_seconds():
+            log.info("Discarding warm-start snapshot, it's too old")
+            return False
+
+        watermark: int = snapshot["watermark"]
+        current = await self.bot.db.fetchval(
+            "SELECT pg_current_xact_id()::TEXT::BIGINT"
+        )
+        if current >> 32 != watermark >> 32:
+            log.info("Discarding warm-start snapshot, its watermark is stale")
+            return False
+
+        for table, (columns, rows) in snapshot["tables"].items():
+            if table not in TABLE_KEYS:
+                continue
+            self.tables[table] = await self._reconcile(
+                table, columns, rows, watermark
+            )
+
+        log.info(f"Restored {len(self.tables)} table(s) from snapshot")
+        return True
+
+    async def _reconcile(
+        self,
+        table: str,
+        columns: tuple[str, ...],
+        rows: list[tuple[Any, ...]],
+        watermark: int,
+    ) -> list[dict[str, Any]]:
+        keys = TABLE_KEYS[table]
+
+        # Stringified, so keys read back from JSON compare equal
+        def key_of(record) -> tuple[str, ...]:
+            return tuple(str(record[k]) for k in keys)
+
+        merged: dict[tuple[str, ...], dict[str, Any]] = {}
+        for row in rows:
+            record = dict(zip(columns, row))
+            merged[key_of(record)] = record
+
+        deleted = await self.bot.db.fetch(
+            """
+            SELECT
+                key
+            FROM
+                row_deletions
+            WHERE
+                table_name=$1 AND
+                xid >= $2
+            """,
+            table,
+            watermark,
+        )
+        # Table names come from TABLE_KEYS, never from user input. xmin
+        # only holds the low 32 bits of a transaction ID
+        changed = await self.bot.db.fetch(
+            f"SELECT * FROM {table} WHERE xmin::TEXT::BIGINT >= $1",
+            watermark & 0xFFFFFFFF,
+        )
+
+        # Deletions first, in case a key was deleted and then re-inserted
+        for record in deleted:
+            merged.pop(key_of(json.loads(record["key"])), None)
+        for record in changed:
+            merged[key_of(record)] = dict(record)
+
+        records = [*merged.values()]
+        if table in GUILD_TABLES:
+            records = [r for r in records if self.bot.owns_guild(r["guild_id"])]
+        return records
+
+    def _shard_layout(self) -> tuple[int, ...]:
+        return (self.bot.shard_count or 1, *sorted(self.bot.local_shards))
+
+    async def write(self):
+        watermark = await self.bot.db.fetchval(
+            "SELECT pg_snapshot_xmin(pg_current_snapshot())::TEXT::BIGINT"
+        )
+        written_at = time.time()
+        # Narrows the staleness window, see the class docstring
+        try:
+            await asyncio.wait_for(self.bot.coherence.wait_applied(), 5)
+        except asyncio.TimeoutError:
+            log.warning("Writing snapshot with remote changes still pending")
+
+        tables: dict[str, SnapshotTable] = {}
+        for table, provider in self.providers.items():
+            records = [*provider()]
+            columns = (*records[0].keys(),) if records else ()
+            tables[table] = (
+                columns,
+                [tuple(record[col] for col in columns) for record in records],
+            )
+
+        data = await asyncio.to_thread(
+            _encode, watermark, written_at, self._shard_layout(), tables
+        )
+        await asyncio.to_thread(_write_file, self.path, data)
+
+        await self.bot.db.execute(
+            "DELETE FROM row_deletions WHERE deleted_at < NOW() - $1::INTERVAL",
+            DELETION_RETENTION,
+        )
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from ..tools.formatters import format_exception
 
@@ -30,6 +30,7 @@ class PeriodicTimer:
         "is_stopped",
         "logger",
         "task",
+        "idle",
     )
 
     def __init__(self, callback: Callable[..., Awaitable[None]], interval: int):
@@ -38,6 +39,10 @@ class PeriodicTimer:
         self.instance = None
         self.is_stopped = False
         self.logger = logging.getLogger(callback.__module__)
+        self.task: Optional[asyncio.Task[None]] = None
+        # Set while the timer is waiting between callbacks
+        self.idle = asyncio.Event()
+        self.idle.set()
 
     def __get__(self, instance: object | None, cls):
         if instance is None:
@@ -50,22 +55,36 @@ class PeriodicTimer:
         self.task = asyncio.create_task(self.runner())
 
     def shutdown(self):
-        if not self.task.done():
+        if self.task and not self.task.done():
             self.is_stopped = True
 
     def cancel(self):
-        if not self.task.done():
+        if self.task and not self.task.done():
             self.task.cancel()
 
+    async def drain(self):
+        """Stops the timer, waiting for a callback in progress to finish"""
+        if self.task and not self.task.done():
+            self.is_stopped = True
+            await self.idle.wait()
+            self.cancel()
+
+    async def run_once(self):
+        """Calls the callback once, outside of the timer's schedule"""
+        if self.instance:
+            await self.callback(self.instance)
+        else:
+            await self.callback()
+
     async def runner(self):
         while True:
+            self.idle.clear()
             try:
-                if self.instance:
-                    await self.callback(self.instance)
-                else:
-                    await self.callback()
+                await self.run_once()
             except BaseException as e:
                 self.logger.error(format_exception(e))
+            finally:
+                self.idle.set()
             if self.is_stopped:
                 self.cancel()
             await asyncio.sleep(self.interval)
@@ -12,6 +12,7 @@ from discord.app_commands import Choice, Transformer
 from typing_extensions import Self
 
 from neo.tools import recursive_get_command
+from neo.tools.timezones import get_timezone, timezones
 from neo.types.commands import AnyCommand
 
 if TYPE_CHECKING:
@@ -74,11 +75,12 @@ def codeblock_transformer(codeblock: str) -> str:
     return codeblock
 
 
-@wrap_transformer(zoneinfo.available_timezones())
+# The catalog only reads the tz database once it's first iterated
+@wrap_transformer(timezones)
 def timezone_transformer(timezone: str) -> str:
     try:
-        zone = zoneinfo.ZoneInfo(timezone)
-    except zoneinfo.ZoneInfoNotFoundError:
+        zone = get_timezone(timezone)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
         raise ValueError("Provided timezone was invalid.")
     return str(zone)
 
@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from neo.modules.metrics import Counter, Gauge
+
+log = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    """
+    Detects and reports event loop stalls
+
+    A heartbeat task on the loop records when it last ran, and a separate
+    thread checks that it keeps doing so. If the heartbeat falls more than
+    `threshold` seconds behind, the thread captures the loop thread's
+    current stack, and reports it along with a label for the task that is
+    running, so that blocking calls can be traced back to their source.
+
+    Tasks can be given descriptive labels with `label`. Unlabelled tasks
+    are reported by their task name.
+    """
+
+    __slots__ = (
+        "threshold",
+        "interval",
+        "labels",
+        "last_beat",
+        "lag_gauge",
+        "stall_counter",
+        "_loop",
+        "_loop_thread_id",
+        "_task",
+        "_thread",
+        "_stop",
+        "_reported",
+    )
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.5,
+        interval: float = 0.1,
+        lag_gauge: Optional[Gauge] = None,
+        stall_counter: Optional[Counter] = None,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.labels: dict[asyncio.Task, str] = {}
+        self.last_beat = time.monotonic()
+        self.lag_gauge = lag_gauge
+        self.stall_counter = stall_counter
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._reported = False
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._watch, name="neo-loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    @contextmanager
+    def label(self, name: str) -> Iterator[None]:
+        """Labels the current task as `name` for the duration of the block"""
+        task = asyncio.current_task()
+        if task is None:
+            yield
+            return
+
+        previous = self.labels.get(task)
+        self.labels[task] = name
+        try:
+            yield
+        finally:
+            if previous is None:
+                self.labels.pop(task, None)
+            else:
+                self.labels[task] = previous
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.last_beat = now
+
+            lag = max(now - expected, 0.0)
+            if self.lag_gauge is not None:
+                self.lag_gauge.set(lag)
+            if self._reported:
+                self._reported = False
+                log.warning(f"Event loop recovered after a {lag:.3f}s stall")
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            stall = time.monotonic() - self.last_beat - self.interval
+            if stall > self.threshold and not self._reported:
+                self._reported = True
+                self._report(stall)
+
+    def _report(self, stall: float):
+        assert self._loop is not None and self._loop_thread_id is not None
+
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = (
+            "".join(traceback.format_stack(frame))
+            if frame is not None
+            else "<stack unavailable>\n"
+        )
+
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            culprit = "a callback outside of any task"
+        else:
+            culprit = self.labels.get(task) or f"task {task.get_name()!r}"
+
+        if self.stall_counter is not None:
+            self.stall_counter.inc()
+        log.warning(
+            f"Event loop blocked for over {stall:.3f}s by {culprit}\n"
+            + stack.rstrip()
+        )
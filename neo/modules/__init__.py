@@ -1,4 +1,13 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # Copyright (C) 2023 sardonicism-04
 from .addon import Addon
-from .menus import ButtonsMenu, DropdownMenu, EmbedPages, Pages
+from .menus import (
+    AsyncIteratorPageSource,
+    ButtonsMenu,
+    DropdownMenu,
+    EmbedPages,
+    MenuRegistry,
+    Pages,
+    PageSource,
+    QueryPageSource,
+)
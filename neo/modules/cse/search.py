@@ -1,5 +1,8 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # Copyright (C) 2023 sardonicism-04
+import asyncio
+import time
+from collections import OrderedDict
 from random import choice
 from typing import Optional
 
@@ -12,12 +15,37 @@ SEARCH_BASE = URL("https://www.googleapis.com/customsearch/v1")
 GoogleError = type("GoogleError", (Exception,), {})
 
 
+CacheKey = tuple[str, bool, bool]
+
+
 def _safe(_input):
     return "active" if _input else "off"
 
 
 class Search:
-    __slots__ = ("key", "engine_id", "session")
+    """
+    A client for the Google Custom Search JSON API
+
+    Responses are cached for `cache_ttl` seconds, holding at most
+    `cache_size` responses, with the least recently used evicted first.
+    Identical searches made while one is already in flight share its
+    request. `hits`, `misses`, and `coalesced` count how searches were
+    served; every hit or coalesced search is a request that didn't count
+    against the API quota.
+    """
+
+    __slots__ = (
+        "key",
+        "engine_id",
+        "session",
+        "cache_size",
+        "cache_ttl",
+        "hits",
+        "misses",
+        "coalesced",
+        "_cache",
+        "_pending",
+    )
 
     def __init__(
         self,
@@ -25,11 +53,23 @@ class Search:
         key: str | list[str],
         engine_id: str,
         session: Optional[ClientSession] = None,
+        cache_size: int = 256,
+        cache_ttl: float = 3600,
     ):
         self.key = key
         self.engine_id = engine_id
         self.session = session or ClientSession()
 
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._cache: OrderedDict[
+            CacheKey, tuple[float, GoogleResponse]
+        ] = OrderedDict()
+        self._pending: dict[CacheKey, asyncio.Future[GoogleResponse]] = {}
+
     async def _perform_search(self, query, *, safesearch=True, image=False):
 
         key = self._get_key()
@@ -53,12 +93,56 @@ class Search:
                         return await self._perform_search(
                             query, safesearch=safesearch, image=image
                         )  # Try to get a new key to use
-                    raise GoogleError(f"Error with search ({error['code']})")
+                # Raised for every error, so that error payloads aren't
+                # cached as results
+                raise GoogleError(f"Error with search ({error.get('code')})")
 
         return GoogleResponse(_data)
 
-    def search(self, *args, **kwargs):
-        return self._perform_search(*args, **kwargs)
+    async def search(self, query, *, safesearch=True, image=False):
+        # Queries differing only in case or spacing get the same results
+        normalized = " ".join(query.casefold().split())
+        key: CacheKey = (normalized, safesearch, image)
+
+        if (cached := self._cache.get(key)) is not None:
+            expires, response = cached
+            if expires > time.monotonic():
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return response
+            del self._cache[key]
+
+        if (pending := self._pending.get(key)) is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = self._pending[key] = asyncio.ensure_future(
+            self._perform_search(query, safesearch=safesearch, image=image)
+        )
+        # Finished by the shared request rather than by this caller, so the
+        # result is still cached if this caller is cancelled while waiting
+        future.add_done_callback(
+            lambda future: self._finish_search(key, future)
+        )
+        return await asyncio.shield(future)
+
+    def _finish_search(
+        self, key: CacheKey, future: asyncio.Future[GoogleResponse]
+    ):
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+        # Failed searches aren't cached, so they can be retried
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        self._cache[key] = (time.monotonic() + self.cache_ttl, future.result())
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        self._cache.clear()
 
     def _get_key(self):
         if isinstance(self.key, list):
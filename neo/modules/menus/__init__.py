@@ -2,3 +2,5 @@
 # Copyright (C) 2023 sardonicism-04
 from .menus import ButtonsMenu, DropdownMenu
 from .pages import EmbedPages, Pages
+from .registry import MenuRegistry
+from .sources import AsyncIteratorPageSource, PageSource, QueryPageSource
@@ -2,7 +2,6 @@
 # Copyright (C) 2023 sardonicism-04
 from __future__ import annotations
 
-import asyncio
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -20,6 +19,8 @@ from neo.classes.context import NeoContext
 from neo.tools import shorten
 
 from .pages import EmbedPages, Pages
+from .refresh import RefreshScheduler
+from .sources import PageSource
 
 if TYPE_CHECKING:
     from neo import Neo
@@ -31,7 +32,7 @@ class SendKwargs(TypedDict):
     reference: Optional[discord.MessageReference]
 
 
-T = TypeVar("T", bound=Pages)
+T = TypeVar("T", bound=Pages | PageSource)
 
 
 class BaseMenu(Generic[T], discord.ui.View):
@@ -42,7 +43,7 @@ class BaseMenu(Generic[T], discord.ui.View):
         "message",
         "current_page",
         "running",
-        "update_lock",
+        "refresher",
         "origin",
         "bot",
         "author",
@@ -57,7 +58,7 @@ class BaseMenu(Generic[T], discord.ui.View):
         self.current_page: int = 0
         self.running = False
 
-        self.update_lock = asyncio.Lock()
+        self.refresher = RefreshScheduler(self.refresh_page)
         self.pages.link(self)
 
     @classmethod
@@ -70,12 +71,25 @@ class BaseMenu(Generic[T], discord.ui.View):
         _pages = EmbedPages(iterable)
         return cls(_pages, **kwargs)
 
+    @property
+    def page_count(self) -> Optional[int]:
+        """The number of pages, or None if a page source doesn't know yet"""
+        if isinstance(self.pages, PageSource):
+            return self.pages.page_count
+        return len(self.pages)
+
+    @final
+    async def fetch_page(self, index: int):
+        if isinstance(self.pages, PageSource):
+            return await self.pages.get_page(index)
+        return self.pages[index]
+
     async def start(
         self, origin: NeoContext | discord.Interaction, *, as_reply=False
     ):
         self.origin = origin
 
-        send_kwargs = self._get_msg_kwargs(self.pages[0])
+        send_kwargs = self._get_msg_kwargs(await self.fetch_page(0))
 
         if isinstance(self.origin, NeoContext):
             # In text commands, menus may optionally be sent as replies
@@ -89,45 +103,72 @@ class BaseMenu(Generic[T], discord.ui.View):
             self.author = self.origin.author
 
         else:
-            await self.origin.response.send_message(view=self, **send_kwargs)
+            # Commands may defer before starting a menu, if building its
+            # pages takes a while
+            if self.origin.response.is_done():
+                await self.origin.edit_original_response(
+                    view=self, **send_kwargs
+                )
+            else:
+                await self.origin.response.send_message(
+                    view=self, **send_kwargs
+                )
             self.bot = self.origin.client  # type: ignore
             self.author = self.origin.user
 
         self.running = True
+        self.bot.menu_registry.register(self)
 
     @final
     def _get_msg_kwargs(self, item) -> dict[str, Any]:
         kwargs = {}
+        page_count = self.page_count
+        page_number = "Page {0}/{1}".format(
+            self.current_page + 1, "?" if page_count is None else page_count
+        )
 
         # If the item is an embed, put the page number in the footer
         if isinstance(item, discord.Embed):
-            item.set_footer(
-                text=f"Page {self.current_page + 1}/{len(self.pages)}"
-            )
+            item.set_footer(text=page_number)
             kwargs["embed"] = item
 
         # If the item is a string, put the page number at the end of the string
         elif isinstance(item, str):
-            item += f"\nPage {self.current_page + 1}/{len(self.pages)}"
+            item += f"\n{page_number}"
             kwargs["content"] = item
         return kwargs
 
     @final
-    def get_current_page(self, index):
+    async def get_current_page(self, index):
         # Logic for when menu is at the first/last page, allows
         # pages to "wrap around"
+        page_count = self.page_count
         if index < 0:
-            index = len(self.pages) - 1
-        if index > (len(self.pages) - 1):
+            if page_count is None:
+                # Wrapping needs the last page, so the source is read to
+                # the end to find it
+                page_count = await cast(
+                    PageSource, self.pages
+                ).get_page_count()
+            index = 0 if page_count is None else page_count - 1
+        if page_count is not None and index > (page_count - 1):
             index = 0
+
+        try:
+            page = await self.fetch_page(index)
+        except IndexError:
+            # Ran off the end of a page source, which now knows its length
+            index = 0
+            page = await self.fetch_page(index)
+
         self.current_page = index
-        return self.pages[index]
+        return page
 
     @final
     async def refresh_page(self):
         # Edits the current page with the contents of the
         # stored pages object
-        kwargs = self._get_msg_kwargs(self.pages[self.current_page])
+        kwargs = self._get_msg_kwargs(await self.fetch_page(self.current_page))
 
         # Interactions need to be handled separately
         if isinstance(self.origin, discord.Interaction):
@@ -144,6 +185,10 @@ class BaseMenu(Generic[T], discord.ui.View):
     ):
         self.stop()
         self.running = False
+        self.refresher.cancel()
+        self.bot.menu_registry.unregister(self)
+        if isinstance(self.pages, PageSource):
+            self.pages.close()
         try:
             # If closed manually, delete the message
             if manual is True:
@@ -174,17 +219,8 @@ class BaseMenu(Generic[T], discord.ui.View):
 
     @final
     def dispatch_update(self):
-        # Dispatches updates to refresh the page without causing race conditions
-        async def inner():
-            if self.update_lock.locked():
-                return
-
-            async with self.update_lock:
-                if self.update_lock.locked():
-                    await asyncio.sleep(1)
-                self.bot.loop.create_task(self.refresh_page())
-
-        self.bot.loop.create_task(inner())
+        # Bursts of updates are coalesced into an edit at most once a second
+        self.refresher.request()
 
     async def interaction_check(self, interaction):
         # Check that the interaction is valid for affecting the menu
@@ -192,7 +228,9 @@ class BaseMenu(Generic[T], discord.ui.View):
             interaction.user.id
             in (self.author.id, *(self.bot.owner_ids or []), self.bot.owner_id)
         )
-        return all(predicates)
+        if passed := all(predicates):
+            self.bot.menu_registry.touch(self)
+        return passed
 
     @final
     async def on_timeout(self):
@@ -217,7 +255,7 @@ class ButtonsMenu(BaseMenu, Generic[T]):
     async def previous_button(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
-        current_page = self.get_current_page(self.current_page - 1)
+        current_page = await self.get_current_page(self.current_page - 1)
         send_kwargs = self._get_msg_kwargs(current_page)
         await interaction.response.edit_message(**send_kwargs)
 
@@ -232,7 +270,7 @@ class ButtonsMenu(BaseMenu, Generic[T]):
     async def next_button(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
-        current_page = self.get_current_page(self.current_page + 1)
+        current_page = await self.get_current_page(self.current_page + 1)
         send_kwargs = self._get_msg_kwargs(current_page)
         await interaction.response.edit_message(**send_kwargs)
 
@@ -244,7 +282,7 @@ class DropdownMenuItem(discord.ui.Select):
         self.menu = menu
 
     async def callback(self, interaction: discord.Interaction):
-        current_page = self.menu.get_current_page(int(self.values[0]))
+        current_page = await self.menu.get_current_page(int(self.values[0]))
         send_kwargs = self.menu._get_msg_kwargs(current_page)
         await interaction.response.edit_message(**send_kwargs)
 
@@ -279,7 +317,28 @@ class DropdownMenu(ButtonsMenu, Generic[T]):
         return cls.from_options(options=options, pages=pages)
 
     @classmethod
-    def from_options(cls, *, options: list[discord.SelectOption], pages: Pages):
+    async def from_source(cls, source: PageSource):
+        """
+        Creates a dropdown menu for a page source, which needs to be able to
+        tell how many pages it has
+        """
+        page_count = await source.get_page_count()
+        if page_count is None:
+            raise ValueError("Page source must know its page count")
+
+        options = [
+            discord.SelectOption(label=f"Page {index}", value=str(index - 1))
+            for index in range(1, page_count + 1)
+        ]
+        return cls.from_options(options=options, pages=source)
+
+    @classmethod
+    def from_options(
+        cls,
+        *,
+        options: list[discord.SelectOption],
+        pages: Pages | PageSource,
+    ):
         if len(options) > 25:
             raise ValueError("Cannot have more than 25 items")
         instance = cls(pages)
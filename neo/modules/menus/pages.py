@@ -2,6 +2,7 @@
 # Copyright (C) 2023 sardonicism-04
 from __future__ import annotations
 
+import operator
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -57,7 +58,6 @@ class Pages:
     """
 
     __slots__ = (
-        "items",
         "joiner",
         "per_page",
         "use_embed",
@@ -66,6 +66,9 @@ class Pages:
         "template_embed",
         "menu",
         "_old_page_count",
+        "_list",
+        "_chunks",
+        "_text",
     )
 
     def __init__(
@@ -83,12 +86,22 @@ class Pages:
         if not isinstance(items, str | list):
             raise TypeError('"items" must be of type list or str')
 
-        self.items = items
         self.joiner = joiner
         self.per_page = per_page
         self.use_embed = use_embed
         self.menu: Optional[BaseMenu] = None
 
+        # Lists are paged by slicing on demand. Strings are stored already
+        # split into page-sized chunks, so that appending to a long string
+        # only touches the end of it, rather than copying the whole thing
+        self._list: Optional[list] = None
+        self._chunks: Optional[list[str]] = None
+        self._text: Optional[str] = None
+        if isinstance(items, str):
+            self._chunks = self._chunk(items)
+        else:
+            self._list = items
+
         if (prefix or suffix) and not isinstance(items, str):
             raise TypeError(
                 'Arguments "prefix" and "suffix" may only be used in conjunction with an input of type str'
@@ -100,36 +113,55 @@ class Pages:
             self.template_embed = template_embed.to_dict()
 
     def __repr__(self):
-        return "<{0.__class__.__name__} pages={1}>".format(
-            self, len(self.pages)
-        )
+        return "<{0.__class__.__name__} pages={1}>".format(self, len(self))
 
     @final
     def link(self, menu: BaseMenu):
         self.menu = menu
 
+    @property
+    def items(self) -> str | list:
+        if self._list is not None:
+            return self._list
+
+        if self._text is None:
+            self._text = "".join(cast(list[str], self._chunks))
+        return self._text
+
     @final
-    def _split_pages(self):
-        _items = self.items
-        _pages = []
-        while _items:
+    def _chunk(self, text: str) -> list[str]:
+        return [
+            text[i : i + self.per_page]
+            for i in range(0, len(text), self.per_page)
+        ]
 
-            if (self.suffix or self.prefix) and isinstance(_items, str):
-                to_append = self.prefix + _items[: self.per_page] + self.suffix
+    @final
+    def _get_page(self, index: SupportsIndex):
+        index = operator.index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("page index out of range")
 
-            else:
-                to_append = _items[: self.per_page]
-            _pages.append(to_append)
-            _items = _items[self.per_page :]
+        if self._chunks is not None:
+            if self.prefix or self.suffix:
+                return self.prefix + self._chunks[index] + self.suffix
+            return self._chunks[index]
 
-        return _pages
+        start = index * self.per_page
+        return cast(list, self._list)[start : start + self.per_page]
 
     @property
     def pages(self):
-        return self._split_pages()
+        return [self._get_page(index) for index in range(len(self))]
 
     def __getitem__(self, index: SupportsIndex):
-        content = self.joiner.join(self.pages[index])
+        page = self._get_page(index)
+        if isinstance(page, str) and not self.joiner:
+            # Joining would only rebuild the string character by character
+            content = page
+        else:
+            content = self.joiner.join(page)
         if self.use_embed:
             return Embed.from_dict(
                 cast(dict, self.template_embed | {"description": content})
@@ -137,31 +169,49 @@ class Pages:
         return content
 
     @final
-    def append(self, new: Any):
-        self._old_page_count = len(self.pages)
-
-        if isinstance(self.items, str) and isinstance(new, str):
-            self.items += new
-        elif isinstance(self.items, list):
-            self.items.append(new)
-
+    def _extended(self, new: Any):
         if self.menu and self.menu.running is True:
+            self.menu.bot.menu_registry.grow(self.menu, new)
             self.menu.dispatch_update()
 
+    @final
+    def append(self, new: Any):
+        self._old_page_count = len(self)
+        added = new
+
+        if self._chunks is not None and isinstance(new, str):
+            # Top up the last page before starting new ones
+            chunks = self._chunks
+            if chunks and (room := self.per_page - len(chunks[-1])) > 0:
+                chunks[-1] += new[:room]
+                new = new[room:]
+            chunks.extend(self._chunk(new))
+            self._text = None
+        elif self._list is not None:
+            self._list.append(new)
+
+        self._extended(added)
+
     @final
     def prepend(self, new: Any):
-        self._old_page_count = len(self.pages)
+        self._old_page_count = len(self)
 
-        if isinstance(self.items, str) and isinstance(new, str):
-            self.items = new + self.items
-        elif isinstance(self.items, list):
-            self.items.insert(0, new)
+        if self._chunks is not None and isinstance(new, str):
+            if len(new) % self.per_page == 0:
+                # Existing page boundaries are unaffected
+                self._chunks[:0] = self._chunk(new)
+            else:
+                self._chunks = self._chunk(new + self.items)
+            self._text = None
+        elif self._list is not None:
+            self._list.insert(0, new)
 
-        if self.menu and self.menu.running is True:
-            self.menu.dispatch_update()
+        self._extended(new)
 
     def __len__(self):
-        return len(self.pages)
+        if self._chunks is not None:
+            return len(self._chunks)
+        return -(-len(cast(list, self._list)) // self.per_page)
 
 
 T = TypeVar("T", bound=BaseEmbed)
@@ -182,4 +232,7 @@ class EmbedPages(Pages, Generic[T]):
         return self.items
 
     def __getitem__(self, index: SupportsIndex):
-        return self.pages[index]
+        return self.items[index]
+
+    def __len__(self):
+        return len(self.items)
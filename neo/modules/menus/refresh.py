@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+import discord
+
+from neo.tools.formatters import format_exception
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+log = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Coalesces requests to refresh a menu into as few edits as possible
+
+    Edits are at least `interval` seconds apart. Any number of requests
+    made while waiting, or while an edit is in progress, result in a single
+    further edit, which always reflects the state as of when it's made, so
+    the last request is never lost.
+    """
+
+    __slots__ = ("callback", "interval", "dirty", "last_run", "task")
+
+    def __init__(
+        self,
+        callback: Callable[[], Coroutine[Any, Any, Any]],
+        *,
+        interval: float = 1.0,
+    ):
+        self.callback = callback
+        self.interval = interval
+        self.dirty = False
+        self.last_run = 0.0
+        self.task: Optional[asyncio.Task[None]] = None
+
+    def request(self):
+        """Requests a refresh, which happens as soon as the interval allows"""
+        self.dirty = True
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def cancel(self):
+        self.dirty = False
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        while self.dirty:
+            if (wait := self.last_run + self.interval - time.monotonic()) > 0:
+                await asyncio.sleep(wait)
+
+            # Cleared before the edit, so requests made during it are kept
+            self.dirty = False
+            self.last_run = time.monotonic()
+            try:
+                await self.callback()
+            except discord.NotFound:
+                # The message is gone, so there's nothing left to refresh
+                self.dirty = False
+            except Exception as e:
+                log.error(f"Failed to refresh menu\n{format_exception(e)}")
@@ -0,0 +1,121 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import logging
+import sys
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional
+
+import discord
+
+from neo.classes.shutdown import create_tracked_task
+
+from .pages import EmbedPages, Pages
+from .sources import PageSource
+
+if TYPE_CHECKING:
+    from neo.modules.metrics import Counter
+
+    from .menus import BaseMenu
+
+log = logging.getLogger(__name__)
+
+
+def _approximate_item_size(item: Any) -> int:
+    if isinstance(item, discord.Embed):
+        # Counts the characters of the embed's text fields
+        return sys.getsizeof(item) + len(item)
+    return sys.getsizeof(item)
+
+
+def approximate_size(pages: Pages | PageSource) -> int:
+    """Roughly how many bytes of page data a menu is holding on to"""
+    if isinstance(pages, PageSource):
+        cached = [item for items in pages._cache.values() for item in items]
+        return sum(map(_approximate_item_size, cached))
+    if isinstance(pages, EmbedPages):
+        return sum(map(_approximate_item_size, pages.items))
+    if pages._chunks is not None:
+        return sum(map(sys.getsizeof, pages._chunks))
+    return sys.getsizeof(pages.items) + sum(
+        map(_approximate_item_size, pages.items)
+    )
+
+
+class MenuRegistry:
+    """
+    Tracks every running menu in the process
+
+    When there are more than `max_menus` menus, or they hold more than
+    `max_bytes` of page data between them, the menus which were least
+    recently interacted with are closed, which disables their components
+    with a final edit and lets them be collected.
+
+    Sizes are approximate. A menu is measured in full when it's
+    registered, and after that only the items added to its pages are.
+    """
+
+    __slots__ = (
+        "menus",
+        "max_menus",
+        "max_bytes",
+        "total_bytes",
+        "evictions",
+    )
+
+    def __init__(
+        self,
+        *,
+        max_menus: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        evictions: Optional[Counter] = None,
+    ):
+        self.max_menus = max_menus
+        self.max_bytes = max_bytes
+        self.evictions = evictions
+
+        # Ordered from least to most recently interacted with
+        self.menus: OrderedDict[BaseMenu, int] = OrderedDict()
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self.menus)
+
+    def register(self, menu: BaseMenu):
+        size = approximate_size(menu.pages)
+        self.total_bytes += size - self.menus.get(menu, 0)
+        self.menus[menu] = size
+        self.menus.move_to_end(menu)
+        self._enforce_budget()
+
+    def grow(self, menu: BaseMenu, item: Any):
+        """Accounts for an item added to a menu's pages"""
+        if menu not in self.menus:
+            return
+        size = _approximate_item_size(item)
+        self.menus[menu] += size
+        self.total_bytes += size
+        self._enforce_budget()
+
+    def touch(self, menu: BaseMenu):
+        """Marks a menu as recently interacted with"""
+        if menu in self.menus:
+            self.menus.move_to_end(menu)
+
+    def unregister(self, menu: BaseMenu):
+        self.total_bytes -= self.menus.pop(menu, 0)
+
+    def _enforce_budget(self):
+        # The most recent menu is always kept, even if it alone is over budget
+        while len(self.menus) > 1 and (
+            len(self.menus) > self.max_menus
+            or self.total_bytes > self.max_bytes
+        ):
+            menu, size = self.menus.popitem(last=False)
+            self.total_bytes -= size
+            if self.evictions is not None:
+                self.evictions.inc()
+
+            log.debug(f"Evicting idle menu {menu!r} ({size} bytes)")
+            create_tracked_task(menu.on_timeout(), name="menu-eviction")
@@ -0,0 +1,324 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import abc
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional, cast, final
+
+from neo.classes import Embed
+from neo.tools.formatters import format_exception
+
+if TYPE_CHECKING:
+    from collections.abc import (
+        AsyncIterable,
+        AsyncIterator,
+        Callable,
+        Iterable,
+    )
+
+    from asyncpg import Pool, Record
+    from discord.types.embed import Embed as EmbedData
+
+    from .menus import BaseMenu
+
+log = logging.getLogger(__name__)
+
+
+class PageSource(abc.ABC):
+    """
+    A base class for sources which supply a menu's pages on demand
+
+    Rather than holding every item up front, subclasses fetch the items of
+    a single page with `fetch_items`. Only the page being viewed and the
+    `prefetch` pages after it are requested, and at most `max_cached`
+    fetched pages are held at once.
+
+    Parameters
+    ----------
+    per_page: int
+        The number of items to be included on each page
+        Default: 1
+    use_embed: bool
+        Whether the items should be returned as a uniform embed
+        Default: False
+    joiner: str
+        The string that will be used to join items on a page
+        Default: "\\n"
+    template_embed: discord.Embed
+        An embed that will be used as a template for all pages
+        (if `use_embed`) is `True`.
+    empty: str
+        What to show if the source has no items at all
+        Default: "Nothing to show"
+    prefetch: int
+        How many pages past the current one to fetch ahead of time
+        Default: 1
+    max_cached: int
+        The maximum number of fetched pages to hold
+        Default: 5
+    """
+
+    __slots__ = (
+        "per_page",
+        "use_embed",
+        "joiner",
+        "template_embed",
+        "empty",
+        "prefetch",
+        "max_cached",
+        "menu",
+        "page_count",
+        "_cache",
+        "_pending",
+    )
+
+    def __init__(
+        self,
+        *,
+        per_page: int = 1,
+        use_embed: bool = False,
+        joiner: str = "\n",
+        template_embed: Optional[Embed] = None,
+        empty: str = "Nothing to show",
+        prefetch: int = 1,
+        max_cached: int = 5,
+    ):
+        self.per_page = per_page
+        self.use_embed = use_embed
+        self.joiner = joiner
+        self.empty = empty
+        self.prefetch = prefetch
+        self.max_cached = max(max_cached, prefetch + 1)
+        self.menu: Optional[BaseMenu] = None
+
+        # The number of pages, if it's known yet
+        self.page_count: Optional[int] = None
+
+        self.template_embed: EmbedData = {}
+        if template_embed is not None:
+            self.template_embed = template_embed.to_dict()
+
+        self._cache: OrderedDict[int, list[Any]] = OrderedDict()
+        self._pending: dict[int, asyncio.Task[list[Any]]] = {}
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} pages={0.page_count}>".format(self)
+
+    @final
+    def link(self, menu: BaseMenu):
+        self.menu = menu
+
+    @abc.abstractmethod
+    async def fetch_items(self, index: int) -> list[Any]:
+        """
+        Returns the items on the page at `index`
+
+        An empty list means that the page is past the end of the source.
+        """
+        raise NotImplementedError
+
+    async def get_page_count(self) -> Optional[int]:
+        """Returns the number of pages, if it can be determined"""
+        return self.page_count
+
+    @final
+    async def _get_items(self, index: int) -> list[Any]:
+        if (items := self._cache.get(index)) is not None:
+            self._cache.move_to_end(index)
+            return items
+
+        # Shared with a prefetch of the same page, if one is underway
+        if (task := self._pending.get(index)) is None:
+            task = self._pending[index] = asyncio.create_task(
+                self.fetch_items(index)
+            )
+        try:
+            items = await asyncio.shield(task)
+        finally:
+            if self._pending.get(index) is task and task.done():
+                del self._pending[index]
+
+        self._cache[index] = items
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return items
+
+    @final
+    def _schedule_prefetch(self, index: int):
+        for ahead in range(index + 1, index + 1 + self.prefetch):
+            if self.page_count is not None and ahead >= self.page_count:
+                break
+            if ahead in self._cache or ahead in self._pending:
+                continue
+
+            task = self._pending[ahead] = asyncio.create_task(
+                self.fetch_items(ahead)
+            )
+            task.add_done_callback(
+                lambda task, ahead=ahead: self._finish_prefetch(ahead, task)
+            )
+
+    @final
+    def _finish_prefetch(self, index: int, task: asyncio.Task[list[Any]]):
+        if self._pending.get(index) is task:
+            del self._pending[index]
+        if task.cancelled():
+            return
+        if (exc := task.exception()) is not None:
+            log.error(
+                f"Failed to prefetch page {index}\n{format_exception(exc)}"
+            )
+            return
+
+        self._cache[index] = task.result()
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    @final
+    async def get_page(self, index: int) -> str | Embed:
+        """
+        Returns the page at `index`, rendered
+
+        Raises IndexError if the page is past the end of the source.
+        """
+        if index < 0:
+            raise IndexError("page index out of range")
+
+        items = await self._get_items(index)
+        if not items:
+            if index == 0:
+                self.page_count = 1
+                return self._render([self.empty])
+            raise IndexError("page index out of range")
+
+        self._schedule_prefetch(index)
+        return self._render(items)
+
+    def _render(self, items: list[Any]) -> str | Embed:
+        content = self.joiner.join(items)
+        if self.use_embed:
+            return Embed.from_dict(
+                cast(dict, self.template_embed | {"description": content})
+            )
+        return content
+
+    def close(self):
+        """Cancels outstanding fetches and drops fetched pages"""
+        for task in self._pending.values():
+            task.cancel()
+        self._pending.clear()
+        self._cache.clear()
+
+
+class AsyncIteratorPageSource(PageSource):
+    """
+    A page source which pulls items from an iterator, sync or async, as
+    pages are viewed
+
+    Items can't be fetched out of order, so every page up to the furthest
+    one viewed is read and kept, and the page count is only known once the
+    iterator is exhausted.
+    """
+
+    __slots__ = ("iterator", "pages_read", "exhausted", "lock")
+
+    def __init__(
+        self, iterator: AsyncIterable[Any] | Iterable[Any], **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        if hasattr(iterator, "__aiter__"):
+            self.iterator: AsyncIterator[Any] = aiter(iterator)  # type: ignore
+        else:
+            self.iterator = self._wrap(iterator)  # type: ignore
+        self.pages_read: list[list[Any]] = []
+        self.exhausted = False
+        self.lock = asyncio.Lock()
+
+    @staticmethod
+    async def _wrap(iterable: Iterable[Any]) -> AsyncIterator[Any]:
+        for item in iterable:
+            yield item
+
+    async def _read_page(self) -> list[Any]:
+        items: list[Any] = []
+        async for item in self.iterator:
+            items.append(item)
+            if len(items) == self.per_page:
+                break
+        else:
+            self.exhausted = True
+        return items
+
+    async def _read_pages(self, until: Optional[int] = None):
+        # Reads up to and including page `until`, or to the end if it's None
+        async with self.lock:
+            while not self.exhausted and (
+                until is None or len(self.pages_read) <= until
+            ):
+                if items := await self._read_page():
+                    self.pages_read.append(items)
+
+            if self.exhausted:
+                self.page_count = max(len(self.pages_read), 1)
+
+    async def get_page_count(self) -> Optional[int]:
+        await self._read_pages()
+        return self.page_count
+
+    async def fetch_items(self, index: int) -> list[Any]:
+        await self._read_pages(index)
+        if index < len(self.pages_read):
+            return self.pages_read[index]
+        return []
+
+
+class QueryPageSource(PageSource):
+    """
+    A page source backed by a database query, which is paged through with
+    LIMIT and OFFSET
+
+    The query must not have its own LIMIT or OFFSET, and should have an
+    ORDER BY so that pages are consistent. Records are converted to page
+    items with `formatter`.
+    """
+
+    __slots__ = ("pool", "query", "args", "formatter")
+
+    def __init__(
+        self,
+        pool: Pool,
+        query: str,
+        *args: Any,
+        formatter: Callable[[Record], Any] = str,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.query = query.strip().rstrip(";")
+        self.args = args
+        self.formatter = formatter
+
+    async def get_page_count(self) -> Optional[int]:
+        if self.page_count is None:
+            rows = await self.pool.fetchval(
+                f"SELECT count(*) FROM ({self.query}) AS paged",
+                *self.args,
+            )
+            self.page_count = max(-(-rows // self.per_page), 1)
+        return self.page_count
+
+    async def fetch_items(self, index: int) -> list[Any]:
+        if self.page_count is None:
+            await self.get_page_count()
+
+        arg_count = len(self.args)
+        records = await self.pool.fetch(
+            f"{self.query} LIMIT ${arg_count + 1} OFFSET ${arg_count + 2}",
+            *self.args,
+            self.per_page,
+            index * self.per_page,
+        )
+        return [*map(self.formatter, records)]
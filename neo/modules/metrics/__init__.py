@@ -0,0 +1,5 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from .collectors import instrument_pool
+from .metrics import Counter, Gauge, Histogram, MetricsRegistry
+from .server import MetricsServer
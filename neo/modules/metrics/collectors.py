@@ -0,0 +1,115 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+if TYPE_CHECKING:
+    from asyncpg import Connection, Pool, Record
+
+    from .metrics import Histogram
+
+
+class TimedAcquire:
+    """
+    Acquires a connection from a pool, recording how long it waited
+
+    Like asyncpg's own acquire context, this can either be awaited or used
+    as an async context manager.
+    """
+
+    __slots__ = ("pool", "timeout", "histogram", "connection")
+
+    def __init__(
+        self, pool: Pool, timeout: Optional[float], histogram: Histogram
+    ):
+        self.pool = pool
+        self.timeout = timeout
+        self.histogram = histogram
+        self.connection: Optional[Connection] = None
+
+    async def _acquire(self) -> Connection:
+        start = time.perf_counter()
+        try:
+            return await self.pool.acquire(timeout=self.timeout)
+        finally:
+            self.histogram.observe(time.perf_counter() - start)
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self) -> Connection:
+        self.connection = await self._acquire()
+        return self.connection
+
+    async def __aexit__(self, *exc_info: Any):
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            await self.pool.release(connection)
+
+
+class InstrumentedPool:
+    """
+    Wraps a pool, recording how long each acquisition waits for a connection
+
+    The query shortcuts (`fetch`, `execute`, etc.) acquire through the
+    wrapper, so they're timed too. Everything else is passed through to
+    the wrapped pool.
+    """
+
+    __slots__ = ("pool", "acquire_histogram")
+
+    def __init__(self, pool: Pool, histogram: Histogram):
+        self.pool = pool
+        self.acquire_histogram = histogram
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.pool, name)
+
+    def acquire(self, *, timeout: Optional[float] = None) -> TimedAcquire:
+        return TimedAcquire(self.pool, timeout, self.acquire_histogram)
+
+    async def execute(
+        self, query: str, *args: Any, timeout: Optional[float] = None
+    ) -> str:
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args, timeout=timeout)
+
+    async def executemany(
+        self, command: str, args: Any, *, timeout: Optional[float] = None
+    ):
+        async with self.acquire() as conn:
+            return await conn.executemany(command, args, timeout=timeout)
+
+    async def fetch(
+        self, query: str, *args: Any, timeout: Optional[float] = None
+    ) -> list[Record]:
+        async with self.acquire() as conn:
+            return await conn.fetch(query, *args, timeout=timeout)
+
+    async def fetchval(
+        self,
+        query: str,
+        *args: Any,
+        column: int = 0,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        async with self.acquire() as conn:
+            return await conn.fetchval(
+                query, *args, column=column, timeout=timeout
+            )
+
+    async def fetchrow(
+        self, query: str, *args: Any, timeout: Optional[float] = None
+    ) -> Optional[Record]:
+        async with self.acquire() as conn:
+            return await conn.fetchrow(query, *args, timeout=timeout)
+
+
+def instrument_pool(pool: Pool, histogram: Histogram) -> Pool:
+    """
+    Returns a wrapper around `pool` which records connection acquisition
+    wait times to `histogram`
+    """
+    return cast("Pool", InstrumentedPool(pool, histogram))
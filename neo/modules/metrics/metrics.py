@@ -0,0 +1,221 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+M = TypeVar("M", bound="Metric")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value))
+
+
+class Metric:
+    """
+    The base class for all metrics
+
+    Metrics may hold values directly, or be backed by a function which is
+    called each time the metric is collected. Functions may return a single
+    value, or a mapping of label values to values.
+    """
+
+    type = "untyped"
+
+    __slots__ = ("name", "documentation", "labelnames", "values", "function")
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[LabelValues, float] = {}
+        self.function: Optional[
+            Callable[[], float | dict[LabelValues, float]]
+        ] = None
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} name={0.name!r}>".format(self)
+
+    def _key(self, labels: dict[str, object]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name!r} expects labels {self.labelnames!r}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(
+        self, function: Callable[[], float | dict[LabelValues, float]]
+    ):
+        """Back this metric with a function that is called on collection"""
+        self.function = function
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, float]]:
+        values = self.values
+        if self.function is not None:
+            result = self.function()
+            values = result if isinstance(result, dict) else {(): result}
+
+        for labels, value in values.items():
+            yield self.name, labels, value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {_escape(self.documentation)}"
+        yield f"# TYPE {self.name} {self.type}"
+        for name, labels, value in self.samples():
+            yield (
+                f"{name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+
+
+class Counter(Metric):
+    type = "counter"
+
+    __slots__ = ()
+
+    def inc(self, amount: float = 1, **labels: object):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    __slots__ = ()
+
+    def set(self, value: float, **labels: object):
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    __slots__ = ("buckets", "counts", "sums")
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*sorted(buckets), float("inf"))
+        self.counts: dict[LabelValues, list[int]] = {}
+        self.sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: object):
+        key = self._key(labels)
+        if key not in self.counts:
+            self.counts[key] = [0] * len(self.buckets)
+            self.sums[key] = 0.0
+
+        # Counts are stored per bucket, and made cumulative on render
+        self.counts[key][bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, float]]:
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    (*labels, _format_value(bound)),
+                    cumulative,
+                )
+            yield f"{self.name}_sum", labels, self.sums[labels]
+            yield f"{self.name}_count", labels, cumulative
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {_escape(self.documentation)}"
+        yield f"# TYPE {self.name} {self.type}"
+        bucket_labels = (*self.labelnames, "le")
+        for name, labels, value in self.samples():
+            names = (
+                bucket_labels if name.endswith("_bucket") else self.labelnames
+            )
+            yield f"{name}{_format_labels(names, labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """
+    Holds all of the metrics for the process
+
+    Metrics are created on first request and returned as-is afterwards, so
+    that addons can safely request their metrics again when reloaded.
+    """
+
+    __slots__ = ("metrics",)
+
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def _get_or_create(
+        self, cls: type[M], name: str, documentation: str, labelnames, **kwargs
+    ) -> M:
+        if (existing := self.metrics.get(name)) is not None:
+            if not isinstance(existing, cls):
+                raise TypeError(f"Metric {name!r} is not a {cls.__name__}")
+            return existing
+
+        metric = cls(name, documentation, (*labelnames,), **kwargs)
+        self.metrics[name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines: list[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
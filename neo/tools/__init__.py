@@ -9,6 +9,8 @@ from discord import app_commands, utils
 
 # Module exports
 from .autocomplete_helpers import (
+    AutocompleteIndex,
+    AutocompleteIndexCache,
     ClearAllOption,
     add_setting_autocomplete,
     generate_autocomplete_list,
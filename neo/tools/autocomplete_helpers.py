@@ -5,10 +5,13 @@ from __future__ import annotations
 from typing import (
     TYPE_CHECKING,
     Any,
+    Generic,
+    Hashable,
     Iterable,
     Literal,
     Optional,
     TypeGuard,
+    TypeVar,
     overload,
 )
 
@@ -17,7 +20,7 @@ from discord import app_commands
 from .formatters import shorten
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Callable, Sequence
 
     from discord import Interaction
     from discord.app_commands import Choice
@@ -26,10 +29,119 @@ if TYPE_CHECKING:
 
 ClearAllOption = "Clear all"
 
+K = TypeVar("K", bound=Hashable)
+
+# Length of the n-grams used to narrow down substring matches
+GRAM_SIZE = 3
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class AutocompleteIndex:
+    """
+    A searchable snapshot of the items offered by an autocomplete
+
+    Items are casefolded once on creation, and each casefolded item is
+    broken into trigrams so that substring lookups only need to check the
+    items which contain every trigram of the query.
+
+    Indexes are immutable; whoever owns the items is responsible for
+    replacing the index when the items change.
+    """
+
+    __slots__ = ("items", "folded", "grams")
+
+    def __init__(self, items: Iterable[str]):
+        self.items: tuple[str, ...] = (*items,)
+        self.folded: tuple[str, ...] = (*(i.casefold() for i in self.items),)
+        self.grams: dict[str, set[int]] = {}
+
+        for index, text in enumerate(self.folded):
+            for gram in _grams(text):
+                self.grams.setdefault(gram, set()).add(index)
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} items={1}>".format(self, len(self))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def search(self, current: str, *, prefix: bool = False) -> list[int]:
+        """
+        Returns the 1-based indices of the items which contain `current`,
+        in their original order
+
+        Parameters
+        ----------
+        current: str
+            The text to look for
+        prefix: bool
+            Whether only items starting with `current` should match
+            Default: False
+        """
+        query = current.casefold()
+
+        if len(query) < GRAM_SIZE:
+            candidates: Iterable[int] = range(len(self.folded))
+        else:
+            # Intersect the smallest sets first so that misses bail early
+            gram_sets = sorted(
+                (self.grams.get(gram, set()) for gram in _grams(query)),
+                key=len,
+            )
+            matched = gram_sets[0].copy()
+            for gram_set in gram_sets[1:]:
+                if not matched:
+                    break
+                matched &= gram_set
+            candidates = sorted(matched)
+
+        # Trigrams can match out of order, so candidates are confirmed
+        # against the full text
+        if prefix:
+            return [
+                i + 1 for i in candidates if self.folded[i].startswith(query)
+            ]
+        return [i + 1 for i in candidates if query in self.folded[i]]
+
+
+class AutocompleteIndexCache(Generic[K]):
+    """
+    Lazily builds and holds an `AutocompleteIndex` per key (typically a
+    user ID) until the key is invalidated
+    """
+
+    __slots__ = ("indexes",)
+
+    def __init__(self):
+        self.indexes: dict[K, AutocompleteIndex] = {}
+
+    def get(
+        self, key: K, items: Callable[[], Iterable[str]]
+    ) -> AutocompleteIndex:
+        """
+        Returns the index for `key`, building it from `items()` if there
+        isn't one cached
+        """
+        if (index := self.indexes.get(key)) is None:
+            index = self.indexes[key] = AutocompleteIndex(items())
+        return index
+
+    def invalidate(self, key: K):
+        self.indexes.pop(key, None)
+
+    def clear(self):
+        self.indexes.clear()
+
 
 @overload
 def generate_autocomplete_list(
-    container: Sequence[Any],
+    container: Sequence[Any] | AutocompleteIndex,
     current: str,
     *,
     insert_wildcard: Literal[True],
@@ -41,7 +153,7 @@ def generate_autocomplete_list(
 
 @overload
 def generate_autocomplete_list(
-    container: Sequence[Any],
+    container: Sequence[Any] | AutocompleteIndex,
     current: str,
     *,
     insert_wildcard: bool = False,
@@ -52,7 +164,7 @@ def generate_autocomplete_list(
 
 
 def generate_autocomplete_list(
-    container: Sequence[str],
+    container: Sequence[str] | AutocompleteIndex,
     current: str,
     *,
     insert_wildcard: bool = False,
@@ -64,8 +176,10 @@ def generate_autocomplete_list(
 
     Parameters
     ----------
-    container: Sequence[str]
-        The items from which the autocomplete list will be generated
+    container: Sequence[str] | AutocompleteIndex
+        The items from which the autocomplete list will be generated.
+        Passing an `AutocompleteIndex` avoids rescanning every item on
+        each keystroke
     current: str
         The current value that the user has input
     insert_wildcard: bool
@@ -119,11 +233,14 @@ def generate_autocomplete_list(
     else:
         # Otherwise, try to find a match against the text content of the
         # items in the container
-        valid_range = [
-            idx
-            for idx, val in enumerate(container, 1)
-            if current.casefold() in val.casefold()
-        ]
+        if isinstance(container, AutocompleteIndex):
+            valid_range = container.search(current)
+        else:
+            valid_range = [
+                idx
+                for idx, val in enumerate(container, 1)
+                if current.casefold() in val.casefold()
+            ]
 
     opts: list[str | int] = (
         [ClearAllOption, *valid_range] if insert_wildcard else [*valid_range]
@@ -219,8 +336,10 @@ def add_setting_autocomplete(
                 values: Iterable[tuple[str, str] | str]
 
                 # If an autocomplete function was provided for a single setting,
-                # use its return value
-                if "autocomplete_func" in setting:
+                # use its return value. It's given the current input, so its
+                # values are used as-is rather than being filtered again
+                is_filtered = "autocomplete_func" in setting
+                if is_filtered:
                     values = setting["autocomplete_func"](interaction, current)
                 # If an autocomplete values iterable was provided, use it
                 elif "autocomplete_values" in setting:
@@ -252,12 +371,16 @@ def add_setting_autocomplete(
 
                 # Return a list of choices, filtered to only values which contain the
                 # current parameter input (and limited to 25 in length)
+                if not is_filtered:
+                    options = [
+                        *filter(
+                            lambda opt: current.casefold() in opt[0].casefold(),
+                            options,
+                        )
+                    ]
                 return [
                     app_commands.Choice(name=name, value=value)
-                    for name, value in filter(
-                        lambda opt: current.casefold() in opt[0].casefold(),
-                        options,
-                    )
+                    for name, value in options
                 ][:25]
 
             command.autocomplete(value_param)(value_param_autocomplete)
@@ -0,0 +1,29 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+"""
+Helpers for Postgres full-text search
+
+Search queries must use the same `to_tsvector('english', content)`
+expression as the indexes in sql/schema.sql, or the indexes won't be used.
+"""
+from discord.utils import escape_markdown
+
+HEADLINE_START = "\x02"
+HEADLINE_STOP = "\x03"
+
+# Matched terms are wrapped in control characters rather than markdown, so
+# that the rest of the snippet can be escaped without escaping the markers
+HEADLINE_OPTIONS = (
+    f'StartSel="{HEADLINE_START}", StopSel="{HEADLINE_STOP}", '
+    "MinWords=5, MaxWords=20, MaxFragments=2, "
+    'FragmentDelimiter=" … "'
+)
+
+
+def format_headline(headline: str) -> str:
+    """Escapes a `ts_headline` snippet for display, bolding matched terms"""
+    return (
+        escape_markdown(headline.replace("\n", " "))
+        .replace(HEADLINE_START, "**")
+        .replace(HEADLINE_STOP, "**")
+    )
@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2023 sardonicism-04
+from __future__ import annotations
+
+import zoneinfo
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import chain, takewhile
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+def _fold(name: str) -> str:
+    # Lets "new york" match "America/New_York"
+    return name.casefold().replace("_", " ")
+
+
+class TimezoneCatalog:
+    """
+    A sorted catalog of every available timezone name
+
+    The tz database is only scanned the first time the catalog is used.
+    Names are sorted and casefolded once, so searches don't have to
+    casefold every name on each keystroke.
+    """
+
+    __slots__ = ("_names", "_folded", "_folded_cities")
+
+    def __init__(self):
+        self._names: Optional[tuple[str, ...]] = None
+        self._folded: tuple[str, ...] = ()
+        self._folded_cities: tuple[str, ...] = ()
+
+    def _build(self) -> tuple[str, ...]:
+        if self._names is None:
+            names = sorted(zoneinfo.available_timezones(), key=_fold)
+            self._folded = (*map(_fold, names),)
+            self._folded_cities = (
+                *(name.rpartition("/")[2] for name in self._folded),
+            )
+            self._names = (*names,)
+        return self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._build())
+
+    def __len__(self):
+        return len(self._build())
+
+    def __contains__(self, name: object):
+        return name in self._build()
+
+    def search(self, current: str, *, limit: int = 25) -> list[str]:
+        """
+        Returns timezone names matching `current`
+
+        Names starting with `current` come first, then names whose last
+        component (usually the city) starts with it, then any other names
+        containing it.
+        """
+        names = self._build()
+        query = _fold(current)
+        if not query:
+            return [*names[:limit]]
+
+        # The catalog is sorted, so prefix matches are a contiguous run
+        start = bisect_left(self._folded, query)
+        prefixes = takewhile(
+            lambda index: self._folded[index].startswith(query),
+            range(start, len(names)),
+        )
+        cities = (
+            index
+            for index, city in enumerate(self._folded_cities)
+            if city.startswith(query)
+        )
+        substrings = (
+            index
+            for index, folded in enumerate(self._folded)
+            if query in folded
+        )
+
+        matched: dict[int, None] = {}
+        for index in chain(prefixes, cities, substrings):
+            matched.setdefault(index)
+            if len(matched) == limit:
+                break
+
+        return [names[index] for index in matched]
+
+
+timezones = TimezoneCatalog()
+
+
+@lru_cache(maxsize=128)
+def get_timezone(name: str) -> zoneinfo.ZoneInfo:
+    """
+    Returns the ZoneInfo for a timezone name
+
+    Raises zoneinfo.ZoneInfoNotFoundError if there's no such timezone.
+    """
+    return zoneinfo.ZoneInfo(name)
@@ -2,6 +2,8 @@
 # Copyright (C) 2023 sardonicism-04
 from typing import TypedDict
 
+from typing_extensions import NotRequired
+
 
 class NeoInvitePreset(TypedDict):
     name: str
@@ -33,6 +35,35 @@ class NeoDataBaseConfig(TypedDict):
     host: str
 
 
+class NeoShardingConfig(TypedDict, total=False):
+    shard_count: int
+    shard_ids: list[int]
+    user_data_owner: bool
+
+
+class NeoSnapshotConfig(TypedDict):
+    path: str
+    interval: int
+
+
+class NeoMetricsConfig(TypedDict):
+    host: str
+    port: int
+
+
+class NeoWatchdogConfig(TypedDict, total=False):
+    threshold: float
+
+
+class NeoEventsConfig(TypedDict, total=False):
+    queue_sizes: dict[str, int]
+
+
+class NeoMenusConfig(TypedDict, total=False):
+    max_menus: int
+    max_bytes: int
+
+
 class NeoConfig(TypedDict):
     addons: list[str]
     upstream_url: str
@@ -42,3 +73,9 @@ class NeoConfig(TypedDict):
 
     bot: NeoBotConfig
     database: NeoDataBaseConfig
+    sharding: NotRequired[NeoShardingConfig]
+    snapshot: NotRequired[NeoSnapshotConfig]
+    metrics: NotRequired[NeoMetricsConfig]
+    watchdog: NotRequired[NeoWatchdogConfig]
+    menus: NotRequired[NeoMenusConfig]
+    events: NotRequired[NeoEventsConfig]
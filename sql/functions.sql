@@ -31,25 +31,71 @@ END;
 $$ LANGUAGE plpgsql;
 
 CREATE
-OR REPLACE FUNCTION is_valid_todo_category(
-    _user_id BIGINT,
-    _cat_name VARCHAR(100) DEFAULT NULL
-) RETURNS BOOLEAN AS $$
+OR REPLACE FUNCTION notify_row_change() RETURNS TRIGGER AS $$
+DECLARE
+    row_data JSONB;
+    old_data JSONB;
+    key_data JSONB := '{}'::JSONB;
+    old_key_data JSONB;
+    key_column TEXT;
 BEGIN
-    -- If no category name is provided, the todo is
-    -- uncategorized, so it's fine
-    IF _cat_name IS NULL THEN
-        RETURN TRUE;
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
     ELSE
-    -- Otherwise, return the boolean result of checking
-    -- if the category name exists in the associated
-    -- todo category column
-        RETURN _cat_name = ANY ((
-            SELECT todo_categories
-            FROM profiles
-            WHERE user_id = _user_id
-        )::VARCHAR(100)[]);
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        old_data := to_jsonb(OLD);
+        old_key_data := '{}'::JSONB;
     END IF;
+
+    -- Notification payloads are capped at 8000 bytes, and going over would
+    -- abort the write that fired the trigger, so only the key columns
+    -- (given as the trigger's arguments) are sent. Listeners re-fetch the
+    -- rest of the row
+    FOREACH key_column IN ARRAY TG_ARGV LOOP
+        key_data := key_data
+            || jsonb_build_object(key_column, row_data -> key_column);
+        IF old_data IS NOT NULL THEN
+            old_key_data := old_key_data
+                || jsonb_build_object(key_column, old_data -> key_column);
+        END IF;
+    END LOOP;
+
+    -- The origin lets each process ignore its own writes, which it has
+    -- already applied locally, and the timestamp lets listeners measure
+    -- how long the notification took to arrive
+    PERFORM pg_notify(
+        'neo_row_change',
+        jsonb_build_object(
+            'table', TG_TABLE_NAME,
+            'operation', TG_OP,
+            'origin', current_setting('application_name'),
+            'sent_at', extract(EPOCH FROM clock_timestamp()),
+            'key', key_data,
+            'old_key', old_key_data
+        )::TEXT
+    );
+    RETURN NULL;
 END;
-$$ LANGUAGE plpgsql
-   CALLED ON NULL INPUT;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+CREATE
+OR REPLACE FUNCTION record_row_deletion() RETURNS TRIGGER AS $$
+DECLARE
+    row_data JSONB := to_jsonb(OLD);
+    key_data JSONB := '{}'::JSONB;
+    key_column TEXT;
+BEGIN
+    -- Key columns are given as the trigger's arguments
+    FOREACH key_column IN ARRAY TG_ARGV LOOP
+        key_data := key_data
+            || jsonb_build_object(key_column, row_data -> key_column);
+    END LOOP;
+
+    INSERT INTO row_deletions (table_name, key)
+    VALUES (TG_TABLE_NAME, key_data);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,5 @@
+-- SPDX-License-Identifier: AGPL-3.0-or-later
+-- Copyright (C) 2023 sardonicism-04
+-- Todos are loaded per user on demand, in creation order
+CREATE INDEX IF NOT EXISTS todos_user_id_created_at_idx
+    ON todos (user_id, created_at);
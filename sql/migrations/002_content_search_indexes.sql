@@ -0,0 +1,8 @@
+-- SPDX-License-Identifier: AGPL-3.0-or-later
+-- Copyright (C) 2023 sardonicism-04
+-- Full-text search over todo and reminder content
+CREATE INDEX IF NOT EXISTS todos_content_search_idx ON todos
+    USING GIN (to_tsvector('english', content));
+
+CREATE INDEX IF NOT EXISTS reminders_content_search_idx ON reminders
+    USING GIN (to_tsvector('english', content));
@@ -0,0 +1,56 @@
+-- SPDX-License-Identifier: AGPL-3.0-or-later
+-- Copyright (C) 2023 sardonicism-04
+-- Moves todo categories out of profiles.todo_categories into their own
+-- table, replacing the per-row category check with a foreign key.
+-- Requires PostgreSQL 15 or newer, for ON DELETE SET NULL (column).
+BEGIN;
+
+CREATE TABLE todo_categories (
+    user_id    BIGINT NOT NULL,
+    name       VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    PRIMARY KEY (user_id, name),
+    FOREIGN KEY (user_id) REFERENCES profiles (user_id) ON DELETE CASCADE
+);
+
+-- Offset each category's timestamp by its array position, so that
+-- ordering by created_at keeps the original order
+INSERT INTO todo_categories (user_id, name, created_at)
+SELECT
+    profiles.user_id,
+    category.name,
+    NOW() + category.position * INTERVAL '1 microsecond'
+FROM
+    profiles,
+    unnest(profiles.todo_categories) WITH ORDINALITY
+        AS category (name, position)
+ON CONFLICT DO NOTHING;
+
+ALTER TABLE todos DROP CONSTRAINT valid_category;
+DROP FUNCTION is_valid_todo_category(BIGINT, VARCHAR);
+
+-- Shouldn't match anything while the old check was in place, but the new
+-- key can't be added if any todo references a missing category
+UPDATE todos
+SET category = NULL
+WHERE
+    category IS NOT NULL AND
+    NOT EXISTS (
+        SELECT 1 FROM todo_categories
+        WHERE
+            todo_categories.user_id = todos.user_id AND
+            todo_categories.name = todos.category
+    );
+
+ALTER TABLE todos
+    ADD FOREIGN KEY (user_id, category)
+    REFERENCES todo_categories (user_id, name)
+    ON DELETE SET NULL (category);
+
+ALTER TABLE profiles DROP COLUMN todo_categories;
+
+CREATE OR REPLACE TRIGGER todo_categories_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON todo_categories
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change();
+
+COMMIT;
@@ -0,0 +1,87 @@
+-- SPDX-License-Identifier: AGPL-3.0-or-later
+-- Copyright (C) 2023 sardonicism-04
+-- Row change notifications now only carry the changed row's key columns,
+-- which each trigger passes to notify_row_change as its arguments. Whole
+-- rows could go over the 8000 byte payload limit, which aborted the write.
+BEGIN;
+
+CREATE
+OR REPLACE FUNCTION notify_row_change() RETURNS TRIGGER AS $$
+DECLARE
+    row_data JSONB;
+    old_data JSONB;
+    key_data JSONB := '{}'::JSONB;
+    old_key_data JSONB;
+    key_column TEXT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        old_data := to_jsonb(OLD);
+        old_key_data := '{}'::JSONB;
+    END IF;
+
+    -- Notification payloads are capped at 8000 bytes, and going over would
+    -- abort the write that fired the trigger, so only the key columns
+    -- (given as the trigger's arguments) are sent. Listeners re-fetch the
+    -- rest of the row
+    FOREACH key_column IN ARRAY TG_ARGV LOOP
+        key_data := key_data
+            || jsonb_build_object(key_column, row_data -> key_column);
+        IF old_data IS NOT NULL THEN
+            old_key_data := old_key_data
+                || jsonb_build_object(key_column, old_data -> key_column);
+        END IF;
+    END LOOP;
+
+    -- The origin lets each process ignore its own writes, which it has
+    -- already applied locally, and the timestamp lets listeners measure
+    -- how long the notification took to arrive
+    PERFORM pg_notify(
+        'neo_row_change',
+        jsonb_build_object(
+            'table', TG_TABLE_NAME,
+            'operation', TG_OP,
+            'origin', current_setting('application_name'),
+            'sent_at', extract(EPOCH FROM clock_timestamp()),
+            'key', key_data,
+            'old_key', old_key_data
+        )::TEXT
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER profiles_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON profiles
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id');
+
+CREATE OR REPLACE TRIGGER guild_configs_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON guild_configs
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('guild_id');
+
+CREATE OR REPLACE TRIGGER highlights_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON highlights
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id', 'content');
+
+CREATE OR REPLACE TRIGGER todos_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON todos
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id', 'todo_id');
+
+CREATE OR REPLACE TRIGGER starboards_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON starboards
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('guild_id');
+
+CREATE OR REPLACE TRIGGER reminders_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON reminders
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id', 'reminder_id');
+
+CREATE OR REPLACE TRIGGER todo_categories_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON todo_categories
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id', 'name');
+
+COMMIT;
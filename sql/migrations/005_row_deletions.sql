@@ -0,0 +1,61 @@
+-- SPDX-License-Identifier: AGPL-3.0-or-later
+-- Copyright (C) 2023 sardonicism-04
+-- Records deletions from snapshotted tables, so that warm starts can
+-- reconcile deletions through an index instead of reading every key.
+BEGIN;
+
+-- Rows deleted from snapshotted tables, so that a warm start can find
+-- what was deleted since its snapshot without reading every key. Entries
+-- are pruned once they're older than any usable snapshot
+CREATE TABLE IF NOT EXISTS row_deletions (
+    table_name TEXT NOT NULL,
+    key        JSONB NOT NULL,
+    xid        BIGINT NOT NULL DEFAULT pg_current_xact_id()::TEXT::BIGINT,
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS row_deletions_table_name_xid_idx
+    ON row_deletions (table_name, xid);
+
+CREATE
+OR REPLACE FUNCTION record_row_deletion() RETURNS TRIGGER AS $$
+DECLARE
+    row_data JSONB := to_jsonb(OLD);
+    key_data JSONB := '{}'::JSONB;
+    key_column TEXT;
+BEGIN
+    -- Key columns are given as the trigger's arguments
+    FOREACH key_column IN ARRAY TG_ARGV LOOP
+        key_data := key_data
+            || jsonb_build_object(key_column, row_data -> key_column);
+    END LOOP;
+
+    INSERT INTO row_deletions (table_name, key)
+    VALUES (TG_TABLE_NAME, key_data);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep tombstones for the tables held in warm-start snapshots, keyed the
+-- same way as `TABLE_KEYS` in neo/classes/snapshot.py
+CREATE OR REPLACE TRIGGER profiles_record_deletion
+    AFTER DELETE ON profiles
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('user_id');
+
+CREATE OR REPLACE TRIGGER guild_configs_record_deletion
+    AFTER DELETE ON guild_configs
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('guild_id');
+
+CREATE OR REPLACE TRIGGER highlights_record_deletion
+    AFTER DELETE ON highlights
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('user_id', 'content');
+
+CREATE OR REPLACE TRIGGER reminders_record_deletion
+    AFTER DELETE ON reminders
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('reminder_id');
+
+CREATE OR REPLACE TRIGGER starboards_record_deletion
+    AFTER DELETE ON starboards
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('guild_id');
+
+COMMIT;
@@ -10,8 +10,7 @@ CREATE TABLE profiles (
     default_ephemeral  BOOLEAN DEFAULT TRUE,
     silence_hl         BOOLEAN DEFAULT FALSE,
     -- Private settings, indirectly modified
-    hl_blocks          BIGINT[] DEFAULT ARRAY[]::BIGINT[],
-    todo_categories    VARCHAR(100)[] DEFAULT ARRAY[]::VARCHAR(100)[]
+    hl_blocks          BIGINT[] DEFAULT ARRAY[]::BIGINT[]
 );
 
 CREATE TABLE guild_configs (
@@ -29,19 +28,33 @@ CREATE TABLE highlights (
     FOREIGN KEY (user_id) REFERENCES profiles (user_id) ON DELETE CASCADE
 );
 
+CREATE TABLE todo_categories (
+    user_id    BIGINT NOT NULL,
+    name       VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    PRIMARY KEY (user_id, name),
+    FOREIGN KEY (user_id) REFERENCES profiles (user_id) ON DELETE CASCADE
+);
+
 CREATE TABLE todos (
     user_id    BIGINT NOT NULL,
     content    TEXT NOT NULL,
     todo_id    UUID NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL,
     category   VARCHAR(100),
-    -- Add a constraint that calls a check function which validates
-    -- that the inserted category name is present in the array of
-    -- todo categories associated with the user_id
-    CONSTRAINT valid_category CHECK (is_valid_todo_category(user_id, category)),
-    FOREIGN KEY (user_id) REFERENCES profiles (user_id) ON DELETE CASCADE
+    FOREIGN KEY (user_id) REFERENCES profiles (user_id) ON DELETE CASCADE,
+    -- Uncategorized todos have a NULL category, which the key doesn't
+    -- check. Deleting a category leaves its todos uncategorized
+    FOREIGN KEY (user_id, category) REFERENCES todo_categories (user_id, name)
+        ON DELETE SET NULL (category)
 );
 
+-- Todos are loaded per user on demand, in creation order
+CREATE INDEX todos_user_id_created_at_idx ON todos (user_id, created_at);
+-- Full-text search over todo content
+CREATE INDEX todos_content_search_idx ON todos
+    USING GIN (to_tsvector('english', content));
+
 -- Use foreign keys so that, if a config is deleted from the guild_configs
 -- table, all related entries in starboard tables are also deleted
 CREATE TABLE starboards (
@@ -77,4 +90,21 @@ CREATE TABLE reminders (
     delta         INTERVAL NOT NULL,
     repeating     BOOLEAN DEFAULT FALSE,
     FOREIGN KEY (user_id) REFERENCES profiles (user_id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+-- Full-text search over reminder content
+CREATE INDEX reminders_content_search_idx ON reminders
+    USING GIN (to_tsvector('english', content));
+
+-- Rows deleted from snapshotted tables, so that a warm start can find
+-- what was deleted since its snapshot without reading every key. Entries
+-- are pruned once they're older than any usable snapshot
+CREATE TABLE row_deletions (
+    table_name TEXT NOT NULL,
+    key        JSONB NOT NULL,
+    xid        BIGINT NOT NULL DEFAULT pg_current_xact_id()::TEXT::BIGINT,
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX row_deletions_table_name_xid_idx
+    ON row_deletions (table_name, xid);
@@ -0,0 +1,53 @@
+-- SPDX-License-Identifier: AGPL-3.0-or-later
+-- Copyright (C) 2023 sardonicism-04
+-- Broadcast row-level changes to every process holding a cached copy.
+-- Each trigger's arguments are the key columns of its table
+CREATE OR REPLACE TRIGGER profiles_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON profiles
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id');
+
+CREATE OR REPLACE TRIGGER guild_configs_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON guild_configs
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('guild_id');
+
+CREATE OR REPLACE TRIGGER highlights_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON highlights
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id', 'content');
+
+CREATE OR REPLACE TRIGGER todos_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON todos
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id', 'todo_id');
+
+CREATE OR REPLACE TRIGGER starboards_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON starboards
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('guild_id');
+
+CREATE OR REPLACE TRIGGER reminders_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON reminders
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id', 'reminder_id');
+
+CREATE OR REPLACE TRIGGER todo_categories_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON todo_categories
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id', 'name');
+
+-- Keep tombstones for the tables held in warm-start snapshots, keyed the
+-- same way as `TABLE_KEYS` in neo/classes/snapshot.py
+CREATE OR REPLACE TRIGGER profiles_record_deletion
+    AFTER DELETE ON profiles
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('user_id');
+
+CREATE OR REPLACE TRIGGER guild_configs_record_deletion
+    AFTER DELETE ON guild_configs
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('guild_id');
+
+CREATE OR REPLACE TRIGGER highlights_record_deletion
+    AFTER DELETE ON highlights
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('user_id', 'content');
+
+CREATE OR REPLACE TRIGGER reminders_record_deletion
+    AFTER DELETE ON reminders
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('reminder_id');
+
+CREATE OR REPLACE TRIGGER starboards_record_deletion
+    AFTER DELETE ON starboards
+    FOR EACH ROW EXECUTE FUNCTION record_row_deletion('guild_id');